@@ -0,0 +1,140 @@
+"""Local fake of the Telegram Bot API for load testing.
+
+``FakeBotAPI`` serves ``http://host:port/bot<token>/<method>`` on the running
+event loop and implements the methods the bot needs: getUpdates (with long
+polling), sendMessage, editMessageText and answerInlineQuery, plus getMe and
+no-op answers for anything else. Point the bot at it with
+``BOT_API_BASE_URL=http://host:port/bot``. Updates are queued with
+``push_update`` and every other API call is reported to ``on_call``, so a load
+generator can match replies to the updates that caused them.
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+BOT_USER = {
+    'id': 1,
+    'is_bot': True,
+    'first_name': 'Load Test',
+    'username': 'loadtest_bot',
+    'can_join_groups': False,
+    'can_read_all_group_messages': False,
+    'supports_inline_queries': True,
+}
+
+class FakeBotAPI:
+    """In-process Bot API server; see the module docstring."""
+
+    def __init__(self, token, on_call=None):
+        self.token = token
+        # Called as on_call(method, params, received_at) for every call except getUpdates
+        self.on_call = on_call
+        self.api_calls = Counter()
+        self._updates = []
+        self._updates_available = asyncio.Event()
+        self._polled = asyncio.Event()
+        self._message_ids = 0
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start serving; returns the bound port."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        # Release long polls still waiting for updates
+        self._updates_available.set()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def wait_for_poll(self, timeout):
+        """Wait until the bot's first getUpdates call, i.e. until it is ready."""
+        await asyncio.wait_for(self._polled.wait(), timeout)
+
+    def push_update(self, update):
+        self._updates.append(update)
+        self._updates_available.set()
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        self._polled.set()
+
+        # Updates below the offset were confirmed by the bot and are dropped
+        self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates and timeout > 0:
+            self._updates_available.clear()
+            try:
+                await asyncio.wait_for(self._updates_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    def _message(self, params, message_id=None):
+        if message_id is None:
+            self._message_ids += 1
+            message_id = self._message_ids
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id', 0)), 'type': 'private'},
+            'from': BOT_USER,
+            'text': params.get('text', ''),
+        }
+
+    async def _call(self, method, params):
+        if method == 'getUpdates':
+            self.api_calls[method] += 1
+            return await self._get_updates(params)
+
+        self.api_calls[method] += 1
+        if self.on_call is not None:
+            self.on_call(method, params, time.perf_counter())
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'sendMessage':
+            return self._message(params)
+        if method == 'editMessageText' and 'chat_id' in params:
+            return self._message(params, int(params['message_id']))
+        return True
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            # HTTP/1.1 keep-alive: the bot's client sends many requests per connection
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                parts = request_line.decode('latin-1').split()
+                path = parts[1].split('?')[0] if len(parts) >= 2 else ''
+                prefix = f'/bot{self.token}/'
+                if not path.startswith(prefix):
+                    status, payload = '404 Not Found', {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+                else:
+                    if headers.get('content-type', '').startswith('application/json'):
+                        params = json.loads(body or b'{}')
+                    else:
+                        params = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+                    result = await self._call(path[len(prefix):], params)
+                    status, payload = '200 OK', {'ok': True, 'result': result}
+
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\n\r\n'.encode('latin-1') + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,259 @@
+"""End-to-end load test of the bot against a local fake Bot API server.
+
+Starts ``fake_bot_api.FakeBotAPI``, runs the real bot (``mt_transliterator
+bot``, i.e. ``main()``) in a subprocess pointed at it, then replays a mix of
+inline queries and direct messages at a fixed rate (or all at once). Every
+reply the bot sends is matched to the update that caused it. Throughput,
+p50/p90/p99 latency and Bot API calls per update are printed as JSON:
+
+    python benchmarks/loadtest.py --updates 2000 --rate 500 --inline-share 0.7
+    python benchmarks/loadtest.py --typing --bot-env POLL_INTERVAL=0 --bot-env MAX_CONCURRENT_UPDATES=64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_bot_api import FakeBotAPI  # noqa: E402
+from pipeline import git_revision, real_looking_text  # noqa: E402
+
+TOKEN = '123456:loadtest'
+# Message updates get their own chat id, so each reply maps back to one update
+CHAT_ID_BASE = 10 ** 9
+
+def message_update(update_id, user_id, text):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': CHAT_ID_BASE + update_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load'},
+            'text': text,
+        },
+    }
+
+def inline_update(update_id, user_id, query):
+    return {
+        'update_id': update_id,
+        'inline_query': {
+            'id': str(update_id),
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load'},
+            'query': query,
+            'offset': '',
+        },
+    }
+
+def build_updates(args):
+    """The update mix: ``(kind, update)`` pairs in send order."""
+    rng = random.Random(args.seed)
+    updates = []
+    while len(updates) < args.updates:
+        update_id = len(updates) + 1
+        user_id = rng.randint(1, args.users)
+        if rng.random() >= args.inline_share:
+            updates.append(('message', message_update(update_id, user_id, real_looking_text(rng, args.message_words))))
+        elif args.typing:
+            # One inline query per keystroke, as Telegram sends them while the user types
+            text = real_looking_text(rng, args.query_words)[:256]
+            for end in range(1, len(text) + 1):
+                if len(updates) == args.updates:
+                    break
+                updates.append(('inline', inline_update(len(updates) + 1, user_id, text[:end])))
+        else:
+            updates.append(('inline', inline_update(update_id, user_id, real_looking_text(rng, args.query_words)[:256])))
+    return updates
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class LoadRun:
+    """Matches the bot's API calls to the updates that caused them."""
+
+    def __init__(self):
+        self.sent = {}
+        self.answered = {}
+        self.calls = Counter()
+        self.unmatched_calls = 0
+        self.all_answered = asyncio.Event()
+        self.expected = 0
+        self.last_activity = time.perf_counter()
+
+    def send(self, api, update):
+        self.sent[update['update_id']] = self.last_activity = time.perf_counter()
+        api.push_update(update)
+
+    async def wait(self, timeout, idle_timeout):
+        """Wait for every reply; returns 'complete', 'idle' (no reply for idle_timeout) or 'timeout'."""
+        deadline = time.perf_counter() + timeout
+        while not self.all_answered.is_set():
+            now = time.perf_counter()
+            if now >= deadline:
+                return 'timeout'
+            if now - self.last_activity >= idle_timeout:
+                # Expected with --typing: superseded inline queries are never answered
+                return 'idle'
+            try:
+                await asyncio.wait_for(self.all_answered.wait(), min(0.1, deadline - now))
+            except asyncio.TimeoutError:
+                pass
+        return 'complete'
+
+    def on_call(self, method, params, received_at):
+        if method in ('sendMessage', 'editMessageText') and 'chat_id' in params:
+            update_id = int(params['chat_id']) - CHAT_ID_BASE
+        elif method == 'answerInlineQuery':
+            update_id = int(params['inline_query_id'])
+        else:
+            return  # Startup calls such as getMe and deleteWebhook
+        if update_id not in self.sent:
+            self.unmatched_calls += 1
+            return
+
+        self.calls[method] += 1
+        # A placeholder that is edited later completes on the edit
+        self.answered[update_id] = self.last_activity = received_at
+        if len(self.answered) == self.expected:
+            self.all_answered.set()
+
+    def report(self, updates, finished):
+        kinds = Counter(kind for kind, _ in updates)
+        latencies = sorted(
+            (self.answered[update_id] - sent_at) * 1000
+            for update_id, sent_at in self.sent.items() if update_id in self.answered
+        )
+        by_kind = {}
+        for kind in kinds:
+            ids = [update['update_id'] for update_kind, update in updates if update_kind == kind]
+            kind_latencies = sorted((self.answered[i] - self.sent[i]) * 1000 for i in ids if i in self.answered)
+            by_kind[kind] = {
+                'updates': len(ids),
+                'answered': len(kind_latencies),
+                'p50_ms': percentile(kind_latencies, 0.50),
+                'p99_ms': percentile(kind_latencies, 0.99),
+            }
+
+        # Inline queries followed by a newer one from the same user are cancelled by the
+        # scheduler and never answered; anything else unanswered was lost
+        superseded = 0
+        newer_inline_from = set()
+        for kind, update in reversed(updates):
+            if kind != 'inline':
+                continue
+            user_id = update['inline_query']['from']['id']
+            if update['update_id'] not in self.answered and user_id in newer_inline_from:
+                superseded += 1
+            newer_inline_from.add(user_id)
+
+        first_sent = min(self.sent.values()) if self.sent else 0
+        last_answer = max(self.answered.values()) if self.answered else first_sent
+        duration = last_answer - first_sent
+        return {
+            'updates': len(updates),
+            'answered': len(self.answered),
+            'superseded_inline': superseded,
+            'lost': len(updates) - len(self.answered) - superseded,
+            'finished': finished,
+            'duration_seconds': duration,
+            'updates_per_second': len(self.answered) / duration if duration > 0 else None,
+            'latency_ms': {
+                'p50': percentile(latencies, 0.50),
+                'p90': percentile(latencies, 0.90),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1] if latencies else None,
+            },
+            'api_calls_per_update': sum(self.calls.values()) / len(updates) if updates else 0,
+            'api_calls': dict(self.calls),
+            'unmatched_api_calls': self.unmatched_calls,
+            'by_kind': by_kind,
+        }
+
+async def run(args):
+    load = LoadRun()
+    api = FakeBotAPI(TOKEN, on_call=load.on_call)
+    port = await api.start('127.0.0.1', args.port)
+
+    env = dict(os.environ, BOT_TOKEN=TOKEN, BOT_MODE='polling', BOT_API_BASE_URL=f'http://127.0.0.1:{port}/bot')
+    for assignment in args.bot_env:
+        name, _, value = assignment.partition('=')
+        env[name] = value
+    output = None if args.verbose else subprocess.DEVNULL
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(REPO_ROOT, 'mt_transliterator.py'), 'bot',
+        env=env, cwd=REPO_ROOT, stdout=output, stderr=output
+    )
+    try:
+        await api.wait_for_poll(args.startup_timeout)
+        if args.warmup:
+            # Let the bot settle (first getUpdates round trip, lazy imports) before timing
+            await asyncio.sleep(args.warmup)
+
+        updates = build_updates(args)
+        load.expected = len(updates)
+        start = time.perf_counter()
+        for index, (kind, update) in enumerate(updates):
+            if args.rate:
+                delay = start + index / args.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            load.send(api, update)
+
+        report = load.report(updates, await load.wait(args.timeout, args.idle_timeout))
+        report['all_api_calls'] = dict(api.api_calls)
+        return report
+    finally:
+        if bot.returncode is None:
+            bot.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(bot.wait(), 15)
+            except asyncio.TimeoutError:
+                bot.kill()
+                await bot.wait()
+        await api.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=1000, help='Updates to send')
+    parser.add_argument('--rate', type=float, default=0, help='Updates per second to offer (0 = all at once)')
+    parser.add_argument('--inline-share', type=float, default=0.7, help='Fraction of updates that are inline queries')
+    parser.add_argument('--typing', action='store_true', help='Send inline queries keystroke by keystroke')
+    parser.add_argument('--users', type=int, default=1000, help='Distinct simulated users')
+    parser.add_argument('--message-words', type=int, default=40, help='Words per direct message')
+    parser.add_argument('--query-words', type=int, default=8, help='Words per inline query')
+    parser.add_argument('--seed', type=int, default=1234, help='Update mix random seed')
+    parser.add_argument('--port', type=int, default=0, help='Fake Bot API port (default: any free port)')
+    parser.add_argument('--bot-env', action='append', default=[], metavar='NAME=VALUE',
+                        help='Environment for the bot process, e.g. POLL_INTERVAL=0 (repeatable)')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Seconds to wait after the bot starts polling')
+    parser.add_argument('--startup-timeout', type=float, default=30, help='Seconds to wait for the bot to start')
+    parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for all replies')
+    parser.add_argument('--idle-timeout', type=float, default=5,
+                        help='Stop waiting once no reply has arrived for this many seconds')
+    parser.add_argument('--verbose', action='store_true', help="Show the bot's output")
+    parser.add_argument('-o', '--output', default='-', help="JSON output file, '-' for stdout (default)")
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'config': {name: value for name, value in vars(args).items() if name not in ('output', 'verbose')},
+        'results': asyncio.run(run(args)),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as target:
+            target.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
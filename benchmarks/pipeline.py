@@ -0,0 +1,309 @@
+"""Benchmark suite for the transliteration pipeline and the bot handlers.
+
+Times each pipeline stage separately on synthetic and real-looking Amharic
+corpora of several sizes, and a column of short strings through the
+columnar batch API when NumPy is installed, then drives ``inline_query`` and
+``transliterate_message`` with real ``Update`` objects backed by a stubbed bot
+(no network). Results are printed as JSON so runs can be compared between
+commits:
+
+    python benchmarks/pipeline.py --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from telegram import Bot, Message, Update  # noqa: E402
+
+import mt_transliterator  # noqa: E402
+from transliterator_core import (  # noqa: E402
+    AMHARIC_MAP, AMHARIC_TRANSLATION_TABLE, clear_word_caches, word_cache_stats
+)
+
+# Common words and phrases so the "real" corpus has chat-like word frequencies
+VOCABULARY = [
+    "ሰላም", "ልጅ", "ለሰላም", "በዓል", "የሰላም", "አማርኛ", "እንዴት", "ነህ", "ነሽ", "ደህና", "ነኝ",
+    "አመሰግናለሁ", "እሺ", "አዎ", "አይ", "ምግብ", "ቤት", "ውሃ", "ቡና", "ዛሬ", "ነገ", "ትናንት",
+    "ኢትዮጵያ", "አዲስ", "አበባ", "መጽሐፍ", "ትምህርት", "ቤተሰብ", "ጓደኛ", "ፍቅር", "እግዚአብሔር",
+    "ይመስገን", "በጣም", "ጥሩ", "ነው", "አይደለም", "የት", "መቼ", "ለምን", "ማን", "ምን",
+]
+PUNCTUATION = ["።", "፣", "፧", "፤"]
+
+# Number of characters (synthetic) or words (real) per corpus size
+SIZES = {
+    'word': 1,
+    'message': 40,
+    'document': 20000,
+}
+
+def synthetic_text(rng, words):
+    """Random Ethiopic syllables grouped into words of 1-6 characters."""
+    syllables = [char for char in AMHARIC_MAP if len(char) == 1 and 'ሀ' <= char <= '፿']
+    return ' '.join(
+        ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 6))) for _ in range(words)
+    )
+
+def real_looking_text(rng, words):
+    """Vocabulary-weighted sentences with Ethiopic punctuation and line breaks."""
+    parts = []
+    for index in range(words):
+        parts.append(rng.choice(VOCABULARY))
+        if index % 9 == 8:
+            parts.append(rng.choice(PUNCTUATION) + ('\n' if index % 27 == 26 else ''))
+    return ' '.join(parts)
+
+def build_corpora(seed):
+    rng = random.Random(seed)
+    corpora = {}
+    for size, words in SIZES.items():
+        corpora[f'synthetic-{size}'] = synthetic_text(rng, words)
+        corpora[f'real-{size}'] = real_looking_text(rng, words)
+    return corpora
+
+def time_call(function, min_time, repeat):
+    """Time a zero-argument callable; returns per-call seconds like timeit."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start) / loops)
+    return {
+        'loops': loops,
+        'min_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+    }
+
+def bench_pipeline(corpora, min_time, repeat):
+    results = {}
+    for name, text in corpora.items():
+        mapped = text.translate(AMHARIC_TRANSLATION_TABLE)
+        words = mapped.split()
+        transliterated, has_amharic = mt_transliterator.transliterate_with_detection(text)
+        query = text[:256]  # Telegram limits inline queries to 256 characters
+        query_transliterated, query_has_amharic = mt_transliterator.transliterate_with_detection(query)
+
+        stages = {
+            'transliterate_amharic': lambda: mt_transliterator.transliterate_amharic(text),
+            # Every word misses the word cache
+            'transliterate_amharic_cold_cache':
+                lambda: (clear_word_caches(), mt_transliterator.transliterate_amharic(text)),
+            'apply_post_processing_rules_preserving_formatting':
+                lambda: mt_transliterator.apply_post_processing_rules_preserving_formatting(mapped),
+            'apply_prefix_apostrophe_rules':
+                lambda: [mt_transliterator.apply_prefix_apostrophe_rules(word) for word in words],
+            'has_amharic_content': lambda: mt_transliterator.has_amharic_content(text),
+            'create_inline_results':
+                lambda: mt_transliterator.create_inline_results(query, query_transliterated, query_has_amharic),
+        }
+        results[name] = {
+            'chars': len(text),
+            'words': len(words),
+            'output_chars': len(transliterated),
+            'has_amharic': has_amharic,
+            'stages': {stage: time_call(function, min_time, repeat) for stage, function in stages.items()},
+        }
+    return results
+
+# Short strings per column in the columnar batch benchmark
+COLUMN_ROWS = 20000
+
+def bench_columns(seed, min_time, repeat):
+    """Per-string calls vs ``columnar.transliterate_column``; None without NumPy."""
+    try:
+        import numpy
+        import columnar
+    except ImportError:
+        return None
+
+    rng = random.Random(seed)
+    rows = [synthetic_text(rng, rng.randint(1, 8)) for _ in range(COLUMN_ROWS)]
+    array = numpy.array(rows)
+    stages = {
+        # Mostly unique rows, so the word cache barely helps
+        'per_string_cold_cache':
+            lambda: (clear_word_caches(), [mt_transliterator.transliterate_amharic(row) for row in rows]),
+        'transliterate_column_numpy': lambda: columnar.transliterate_column(array),
+    }
+    if columnar.pa is not None:
+        arrow_array = columnar.pa.array(rows)
+        stages['transliterate_column_arrow'] = lambda: columnar.transliterate_column(arrow_array)
+    return {
+        'rows': len(rows),
+        'chars': sum(map(len, rows)),
+        'stages': {stage: time_call(function, min_time, repeat) for stage, function in stages.items()},
+    }
+
+class StubBot(Bot):
+    """Bot whose API methods return immediately instead of calling Telegram."""
+
+    def __init__(self):
+        super().__init__(token='123456:benchmark')
+        # Bot objects are frozen after __init__; the Counter itself stays mutable
+        with self._unfrozen():
+            self.api_calls = Counter()
+
+    async def send_message(self, chat_id, text, *args, **kwargs):
+        self.api_calls['sendMessage'] += 1
+        return Message.de_json(
+            {'message_id': 1, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': text},
+            self
+        )
+
+    async def edit_message_text(self, text, *args, **kwargs):
+        self.api_calls['editMessageText'] += 1
+        return True
+
+    async def answer_inline_query(self, *args, **kwargs):
+        self.api_calls['answerInlineQuery'] += 1
+        return True
+
+class StubContext:
+    """The parts of a handler context the handlers use: per-chat data, with no scheme chosen."""
+
+    def __init__(self):
+        self.chat_data = {}
+
+def message_update(bot, text, update_id=1):
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': 42, 'type': 'private'},
+            'from': {'id': 42, 'is_bot': False, 'first_name': 'Bench'},
+            'text': text,
+        },
+    }, bot)
+
+def inline_update(bot, query, user_id=42, update_id=1):
+    return Update.de_json({
+        'update_id': update_id,
+        'inline_query': {
+            'id': str(update_id),
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'},
+            'query': query,
+            'offset': '',
+        },
+    }, bot)
+
+def clear_inline_caches():
+    mt_transliterator._inline_results_cache.clear()
+    mt_transliterator._inline_user_prefixes.clear()
+
+def bench_handlers(corpora, min_time, repeat):
+    bot = StubBot()
+    context = StubContext()
+    loop = asyncio.new_event_loop()
+    results = {}
+    # Time the work, not the pause between the parts of a long reply (reported separately)
+    part_interval = mt_transliterator.MESSAGE_PART_INTERVAL
+    mt_transliterator.MESSAGE_PART_INTERVAL = 0
+
+    def handler_case(handler, update, before=None):
+        def run():
+            if before is not None:
+                before()
+            loop.run_until_complete(handler(update, context))
+        bot.api_calls.clear()
+        run()
+        api_calls = sum(bot.api_calls.values())
+        # Added by MESSAGE_PART_INTERVAL in production: one pause between consecutive parts
+        pauses = max(0, bot.api_calls['sendMessage'] - 1)
+        timing = time_call(run, min_time, repeat)
+        timing['api_calls_per_update'] = api_calls
+        timing['part_interval_seconds'] = part_interval * pauses
+        return timing
+
+    try:
+        for name, text in corpora.items():
+            query = text[:256]
+            # Telegram limits text messages to 4096 characters
+            message = text[:4096]
+            results[name] = {
+                'transliterate_message':
+                    handler_case(mt_transliterator.transliterate_message, message_update(bot, message)),
+                'inline_query_cold': handler_case(
+                    mt_transliterator.inline_query, inline_update(bot, query), before=clear_inline_caches
+                ),
+                'inline_query_cached': handler_case(mt_transliterator.inline_query, inline_update(bot, query)),
+            }
+
+        # Simulate typing: one inline query per keystroke from the same user
+        typed = corpora['real-message'][:256]
+        keystrokes = [typed[:end] for end in range(1, len(typed) + 1)]
+
+        def typing_session():
+            clear_inline_caches()
+            for update_id, query in enumerate(keystrokes):
+                loop.run_until_complete(
+                    mt_transliterator.inline_query(inline_update(bot, query, update_id=update_id), context)
+                )
+        session = time_call(typing_session, min_time, repeat)
+        session['keystrokes'] = len(keystrokes)
+        results['inline-typing-session'] = session
+    finally:
+        mt_transliterator.MESSAGE_PART_INTERVAL = part_interval
+        loop.close()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=1234, help='Corpus random seed')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per case')
+    parser.add_argument('--skip-handlers', action='store_true', help='Only benchmark the pipeline functions')
+    parser.add_argument('-o', '--output', default='-', help="JSON output file, '-' for stdout (default)")
+    args = parser.parse_args()
+
+    corpora = build_corpora(args.seed)
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'pipeline': bench_pipeline(corpora, args.min_time, args.repeat),
+        'columns': bench_columns(args.seed, args.min_time, args.repeat),
+    }
+    if not args.skip_handlers:
+        report['handlers'] = bench_handlers(corpora, args.min_time, args.repeat)
+    report['word_cache'] = word_cache_stats()
+
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as target:
+            target.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
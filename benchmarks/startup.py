@@ -0,0 +1,68 @@
+"""Startup benchmark: import time and peak RSS of the core engine vs. the bot.
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+Results are printed as JSON, e.g.:
+
+    python benchmarks/startup.py --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter: time the import and report peak RSS in KiB
+CHILD_SCRIPT = '''
+import json, resource, time
+start = time.perf_counter()
+import {module}
+import_seconds = time.perf_counter() - start
+print(json.dumps({{
+    "import_seconds": import_seconds,
+    "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+'''
+
+MODULES = {
+    'core': 'transliterator_core',
+    'bot': 'mt_transliterator',
+}
+
+def measure(module, repeat):
+    """Import a module `repeat` times in fresh interpreters and summarize the runs."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT.format(module=module)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        process_seconds = time.perf_counter() - start
+        run = json.loads(output)
+        run['process_seconds'] = process_seconds
+        runs.append(run)
+
+    return {
+        'module': module,
+        'repeat': repeat,
+        'import_seconds_median': statistics.median(run['import_seconds'] for run in runs),
+        'process_seconds_median': statistics.median(run['process_seconds'] for run in runs),
+        'max_rss_kib_median': statistics.median(run['max_rss_kib'] for run in runs),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='Fresh interpreters per module')
+    parser.add_argument('--only', choices=sorted(MODULES), help='Measure just one target')
+    args = parser.parse_args()
+
+    targets = [args.only] if args.only else list(MODULES)
+    results = {name: measure(MODULES[name], args.repeat) for name in targets}
+    print(json.dumps({'python': sys.version.split()[0], 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Columnar batch transliteration for NumPy and Arrow string arrays.
+
+``transliterate_column`` takes a whole column (a NumPy ``str``/``object``
+array, or a pyarrow ``StringArray``/``LargeStringArray``/``ChunkedArray``) and
+returns a column of the same kind and shape, with the same output as calling
+``transliterate_amharic`` per element.
+
+The batch is handled as one codepoint array: NumPy ``str`` arrays already are
+one (UTF-32), Arrow data is decoded in a single call. Each codepoint is looked
+up in an offsets-plus-data table built from the scheme, and the output is
+gathered with a vectorized ragged copy. Word rules then run as a single regex
+pass over the whole batch, with control characters marking element and
+Ethiopic segment boundaries so the result matches the per-string path. No
+Python ``str`` is created per element except for ``object`` arrays, whose
+elements are Python strings to begin with.
+
+NumPy is required; pyarrow is optional. Neither is needed by the bot.
+"""
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # NumPy-only installs
+    pa = None
+
+from schemes import ETHIOPIC_BASE, ETHIOPIC_SIZE
+from transliterator_core import WORD_PREFIX_PATTERN, get_scheme, transliterate_amharic
+
+# Codepoints str.isspace() and the word rules' \s treat as whitespace, listed out
+# because scanning all of Unicode for them takes ~90 ms at import
+WHITESPACE_CODEPOINTS = np.array([
+    *range(0x09, 0x0E), *range(0x1C, 0x21), 0x85, 0xA0, 0x1680,
+    *range(0x2000, 0x200B), 0x2028, 0x2029, 0x202F, 0x205F, 0x3000,
+], dtype=np.uint32)
+
+# Markers inserted before the rules pass and removed after it. Both separators
+# are whitespace to the rules: one starts each element, the other ends an
+# Ethiopic run where non-Ethiopic text follows, and the NUL after it keeps that
+# text from starting a word. The rules never produce or consume them.
+_ELEMENT_SEPARATOR = 0x1F
+_SEGMENT_BREAK = (0x1E, 0x00)
+_MARKER_CODEPOINTS = np.array([0x00, 0x1E, 0x1F], dtype=np.uint32)
+_REMOVE_MARKERS = {0x00: None, 0x1E: None}
+
+class ColumnTables:
+    """A scheme flattened into lookup arrays over codepoint keys.
+
+    Keys ``0..ETHIOPIC_SIZE-1`` are the Ethiopic block, the next 128 are
+    ASCII, then come the two-codepoint sequences and the special keys below.
+    Other codepoints pass through as themselves.
+    """
+
+    def __init__(self, scheme):
+        table = scheme.translate_table
+        outputs = [table.get(ETHIOPIC_BASE + index, chr(ETHIOPIC_BASE + index)) for index in range(ETHIOPIC_SIZE)]
+        outputs += [table.get(code, chr(code)) for code in range(128)]
+        self.ascii_key = ETHIOPIC_SIZE
+        self.sequence_key = len(outputs)
+        self.sequences = list(scheme.sequence_rules.rules.items())
+        outputs += [latin for _, latin in self.sequences]
+        self.empty_key = len(outputs)
+        self.element_key = self.empty_key + 1
+        self.segment_break_key = self.empty_key + 2
+        self.passthrough_key = self.empty_key + 3
+        outputs += ['', chr(_ELEMENT_SEPARATOR), ''.join(map(chr, _SEGMENT_BREAK))]
+
+        lengths = [len(output) for output in outputs] + [1]
+        self.lengths = np.array(lengths, dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(self.lengths[:-1])))
+        self.data = np.array([ord(char) for output in outputs for char in output] + [0], dtype=np.uint32)
+        self.word_rules = scheme.word_rules
+
+    @staticmethod
+    def supports(scheme):
+        """Whether the vectorized path reproduces this scheme exactly."""
+        for code, output in scheme.translate_table.items():
+            if code >= 128 and not ETHIOPIC_BASE <= code < ETHIOPIC_BASE + ETHIOPIC_SIZE and output != chr(code):
+                return False
+        # Two-codepoint sequences only, and no codepoint that both starts and ends one,
+        # so matches can't overlap and longest-match order doesn't matter
+        sequences = scheme.sequence_rules.rules
+        firsts = {sequence[0] for sequence in sequences}
+        return all(len(sequence) == 2 for sequence in sequences) and not firsts & {s[1] for s in sequences}
+
+_tables = {}
+
+def column_tables(scheme):
+    tables = _tables.get(scheme.fingerprint)
+    if tables is None:
+        tables = _tables[scheme.fingerprint] = ColumnTables(scheme)
+    return tables
+
+def transliterate_column(column, scheme=None):
+    """Transliterate every element of a NumPy or Arrow string column.
+
+    Returns a column of the same type and shape. Nulls (Arrow nulls, ``None``
+    in ``object`` arrays) stay null. ``scheme`` is as for
+    ``transliterate_amharic``.
+    """
+    scheme = get_scheme(scheme)
+    if pa is not None and isinstance(column, pa.ChunkedArray):
+        return pa.chunked_array([_transliterate_arrow(chunk, scheme) for chunk in column.chunks], type=column.type)
+    if pa is not None and isinstance(column, pa.Array):
+        return _transliterate_arrow(column, scheme)
+
+    array = np.asarray(column)
+    if array.dtype.kind == 'U':
+        return _transliterate_numpy(array, scheme)
+    if array.dtype == object:
+        nulls = np.equal(array, None)
+        strings = np.where(nulls, '', array).astype(str) if array.size else np.zeros(array.shape, dtype='<U1')
+        result = _transliterate_numpy(strings, scheme).astype(object)
+        result[nulls] = None
+        return result
+    raise TypeError(f"Expected a string column, got dtype {array.dtype}")
+
+def _transliterate_numpy(array, scheme):
+    width = array.dtype.itemsize // 4
+    if array.size == 0 or width == 0:
+        return array.copy()
+    grid = np.ascontiguousarray(array).reshape(-1).view(np.uint32).reshape(-1, width)
+    # NumPy strings drop trailing NULs, so an element ends after its last nonzero codepoint
+    nonzero = grid != 0
+    lengths = np.where(nonzero.any(axis=1), width - np.argmax(nonzero[:, ::-1], axis=1), 0)
+    codepoints = grid[np.arange(width) < lengths[:, None]]
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    output, output_offsets = _transliterate_codepoints(codepoints, offsets, scheme)
+    if output is None:
+        return np.array([transliterate_amharic(text, scheme.name) for text in array.reshape(-1)]).reshape(array.shape)
+
+    output_lengths = np.diff(output_offsets)
+    output_width = max(int(output_lengths.max()), 1)
+    result = np.zeros((len(output_lengths), output_width), dtype=np.uint32)
+    rows = np.repeat(np.arange(len(output_lengths)), output_lengths)
+    columns = np.arange(len(output)) - np.repeat(output_offsets[:-1], output_lengths)
+    result[rows, columns] = output
+    return result.view(f'<U{output_width}').reshape(array.shape)
+
+def _transliterate_arrow(array, scheme):
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        raise TypeError(f"Expected an Arrow string array, got {array.type}")
+    offset_type = np.int64 if pa.types.is_large_string(array.type) else np.int32
+    _, offsets_buffer, data_buffer = array.buffers()
+    byte_offsets = np.frombuffer(offsets_buffer, dtype=offset_type)[array.offset:array.offset + len(array) + 1]
+    byte_offsets = byte_offsets.astype(np.int64)
+    data = np.zeros(0, dtype=np.uint8)
+    if data_buffer is not None and len(array):
+        data = np.frombuffer(data_buffer, dtype=np.uint8)[byte_offsets[0]:byte_offsets[-1]]
+
+    # One decode for the whole batch; element offsets move from bytes to codepoints
+    codepoints = np.frombuffer(data.tobytes().decode('utf-8').encode('utf-32-le'), dtype=np.uint32)
+    starts_codepoint = np.concatenate(([0], np.cumsum((data & 0xC0) != 0x80)))
+    offsets = starts_codepoint[byte_offsets - byte_offsets[0]]
+
+    output, output_offsets = _transliterate_codepoints(codepoints, offsets, scheme)
+    if output is None:
+        return pa.array(
+            [None if text is None else transliterate_amharic(text, scheme.name) for text in array.to_pylist()],
+            type=array.type
+        )
+
+    encoded = np.frombuffer(output.tobytes().decode('utf-32-le').encode('utf-8'), dtype=np.uint8)
+    # UTF-8 offsets: count the bytes of each output codepoint
+    widths = 1 + (output >= 0x80) + (output >= 0x800) + (output >= 0x10000)
+    output_byte_offsets = np.concatenate(([0], np.cumsum(widths)))[output_offsets].astype(offset_type)
+    validity = None
+    if array.null_count:
+        validity = array.is_valid().buffers()[1]
+    return pa.Array.from_buffers(
+        array.type, len(array), [validity, pa.py_buffer(output_byte_offsets), pa.py_buffer(encoded)],
+        null_count=array.null_count
+    )
+
+def _transliterate_codepoints(codepoints, offsets, scheme):
+    """Transliterate a batch given as flat codepoints plus element offsets.
+
+    Returns ``(codepoints, offsets)`` for the output, or ``(None, None)`` when
+    the batch or scheme needs the per-string path.
+    """
+    if not ColumnTables.supports(scheme):
+        return None, None
+    tables = column_tables(scheme)
+    if np.isin(codepoints, _MARKER_CODEPOINTS).any():
+        return None, None
+
+    count = len(offsets) - 1
+    keys = np.full(len(codepoints), tables.passthrough_key, dtype=np.int64)
+    ethiopic = (codepoints >= ETHIOPIC_BASE) & (codepoints < ETHIOPIC_BASE + ETHIOPIC_SIZE)
+    keys[ethiopic] = codepoints[ethiopic] - ETHIOPIC_BASE
+    ascii_chars = codepoints < 128
+    keys[ascii_chars] = codepoints[ascii_chars] + tables.ascii_key
+
+    # Multi-codepoint sequences, never across an element boundary
+    element_start = np.zeros(len(codepoints) + 1, dtype=bool)
+    element_start[offsets] = True
+    for index, (sequence, _) in enumerate(tables.sequences):
+        first, second = ord(sequence[0]), ord(sequence[1])
+        matches = np.flatnonzero(
+            (codepoints[:-1] == first) & (codepoints[1:] == second) & ~element_start[1:-1]
+        )
+        keys[matches] = tables.sequence_key + index
+        keys[matches + 1] = tables.empty_key
+
+    # Marker keys go in front of the codepoint they precede
+    insert_at = [offsets[:-1]]
+    insert_keys = [np.full(count, tables.element_key)]
+    if tables.word_rules:
+        other = ~ethiopic & ~np.isin(codepoints, WHITESPACE_CODEPOINTS)
+        # Each run of non-Ethiopic, non-whitespace text within an element
+        follows_other = np.concatenate(([False], other[:-1])) & ~element_start[:-1]
+        breaks = np.flatnonzero(other & ~follows_other)
+        insert_at.append(breaks)
+        insert_keys.append(np.full(len(breaks), tables.segment_break_key))
+    keys = np.insert(keys, np.concatenate(insert_at), np.concatenate(insert_keys))
+    source = np.insert(codepoints, np.concatenate(insert_at), 0)
+
+    # Ragged gather: each key copies its slice of the table data
+    lengths = tables.lengths[keys]
+    output_starts = np.concatenate(([0], np.cumsum(lengths)))
+    total = int(output_starts[-1])
+    positions = np.repeat(tables.starts[keys] - output_starts[:-1], lengths) + np.arange(total)
+    output = tables.data[positions]
+    passthrough = keys == tables.passthrough_key
+    output[output_starts[:-1][passthrough]] = source[passthrough]
+
+    if tables.word_rules:
+        text = WORD_PREFIX_PATTERN.sub(r"\1'", output.tobytes().decode('utf-32-le')).translate(_REMOVE_MARKERS)
+        output = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    separators = np.flatnonzero(output == _ELEMENT_SEPARATOR)
+    output = np.delete(output, separators)
+    output_offsets = np.concatenate((separators - np.arange(count), [len(output)]))
+    return output, output_offsets
@@ -1,11 +1,53 @@
 import logging
 import os
-import re
-from telegram import Update, InlineQueryResultArticle, InputTextMessageContent
+from telegram import Update, InlineQueryResultArticle, InlineQueryResultsButton, InputTextMessageContent
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, InlineQueryHandler
-from telegram.constants import ParseMode
-import uuid
+from telegram.constants import ChatAction, MessageLimit, ParseMode
+from telegram.error import RetryAfter, TimedOut
+import hashlib
 import asyncio
+import argparse
+import functools
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from telegram.request import HTTPXRequest
+import httpx
+
+import metrics
+from schemes import SCHEME_SOURCES, refresh_scheme_table
+from scheduler import (
+    DEFAULT_MAX_CONCURRENT_UPDATES,
+    DEFAULT_MAX_CONCURRENT_UPDATES_PER_USER,
+    FairUpdateProcessor,
+)
+
+# The transliteration engine is dependency-free; re-exported here for existing imports
+from transliterator_core import (
+    AMHARIC_MAP,
+    CONSONANT_CLUSTERS,
+    PREFIXES_WITH_APOSTROPHE,
+    has_amharic_content,
+    transliterate_with_detection,
+    transliterate_amharic,
+    transliterate_to_geez,
+    apply_post_processing_rules_preserving_formatting,
+    apply_post_processing_rules,
+    apply_prefix_apostrophe_rules,
+    transliterate_stream,
+    transliterate_many,
+    transliterate_file,
+    word_cache_stats,
+    persist_word_caches,
+    warm_word_caches,
+    add_offline_commands,
+    SOURCE_SEQUENCE_RULES,
+    DEFAULT_SCHEME_NAME,
+    available_schemes,
+    get_scheme,
+)
 
 # Set up logging with less verbose output
 logging.basicConfig(
@@ -14,273 +56,163 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Improved transliteration map with better accuracy
-AMHARIC_MAP = {
-    # ሀ Series
-    "ሀ": "ha", "ሁ": "hu", "ሂ": "hi", "ሃ": "ha", "ሄ": "he", "ህ": "h", "ሆ": "ho", "ሇ": "hwa",
-    
-    # ለ Series  
-    "ለ": "le", "ሉ": "lu", "ሊ": "li", "ላ": "la", "ሌ": "le", "ል": "l", "ሎ": "lo", "ሏ": "lwa",
-    
-    # ሐ Series (hammeru ha)
-    "ሐ": "ha", "ሑ": "hu", "ሒ": "hi", "ሓ": "ha", "ሔ": "he", "ሕ": "h", "ሖ": "ho", "ሗ": "hwa",
-    
-    # መ Series
-    "መ": "me", "ሙ": "mu", "ሚ": "mi", "ማ": "ma", "ሜ": "me", "ም": "m", "ሞ": "mo", "ሟ": "mwa",
-    
-    # ሠ Series
-    "ሠ": "se", "ሡ": "su", "ሢ": "si", "ሣ": "sa", "ሤ": "se", "ሥ": "s", "ሦ": "so", "ሧ": "swa",
-    
-    # ረ Series
-    "ረ": "re", "ሩ": "ru", "ሪ": "ri", "ራ": "ra", "ሬ": "re", "ር": "r", "ሮ": "ro", "ሯ": "rwa",
-    
-    # ሰ Series
-    "ሰ": "se", "ሱ": "su", "ሲ": "si", "ሳ": "sa", "ሴ": "se", "ስ": "s", "ሶ": "so", "ሷ": "swa",
-    
-    # ሸ Series
-    "ሸ": "she", "ሹ": "shu", "ሺ": "shi", "ሻ": "sha", "ሼ": "she", "ሽ": "sh", "ሾ": "sho", "ሿ": "shwa",
-    
-    # ቀ Series
-    "ቀ": "qe", "ቁ": "qu", "ቂ": "qi", "ቃ": "qa", "ቄ": "qe", "ቅ": "q", "ቆ": "qo", "ቇ": "qwa",
-    
-    # በ Series
-    "በ": "be", "ቡ": "bu", "ቢ": "bi", "ባ": "ba", "ቤ": "be", "ብ": "b", "ቦ": "bo", "ቧ": "bwa",
-    
-    # ቨ Series
-    "ቨ": "ve", "ቩ": "vu", "ቪ": "vi", "ቫ": "va", "ቬ": "ve", "ቭ": "v", "ቮ": "vo", "ቯ": "vwa",
-    
-    # ተ Series
-    "ተ": "te", "ቱ": "tu", "ቲ": "ti", "ታ": "ta", "ቴ": "te", "ት": "t", "ቶ": "to", "ቷ": "twa",
-    
-    # ቸ Series
-    "ቸ": "che", "ቹ": "chu", "ቺ": "chi", "ቻ": "cha", "ቼ": "che", "ች": "ch", "ቾ": "cho", "ቿ": "chwa",
-    
-    # ኀ Series (same as ሀ)
-    "ኀ": "ha", "ኁ": "hu", "ኂ": "hi", "ኃ": "ha", "ኄ": "he", "ኅ": "h", "ኆ": "ho", "ኇ": "hwa",
-    
-    # ነ Series
-    "ነ": "ne", "ኑ": "nu", "ኒ": "ni", "ና": "na", "ኔ": "ne", "ን": "n", "ኖ": "no", "ኗ": "nwa",
-    
-    # ኘ Series
-    "ኘ": "gne", "ኙ": "gnu", "ኚ": "gni", "ኛ": "gna", "ኜ": "gne", "ኝ": "gn", "ኞ": "gno", "ኟ": "gnwa",
-    
-    # Vowels (independent)
-    "አ": "a", "ኡ": "u", "ኢ": "i", "ኣ": "a", "ኤ": "e", "እ": "", "ኦ": "o", "ኧ": "wa",
-    
-    # ከ Series
-    "ከ": "ke", "ኩ": "ku", "ኪ": "ki", "ካ": "ka", "ኬ": "ke", "ክ": "k", "ኮ": "ko", "ኯ": "kwa",
-    
-    # ኸ Series
-    "ኸ": "khe", "ኹ": "khu", "ኺ": "khi", "ኻ": "kha", "ኼ": "khe", "ኽ": "kh", "ኾ": "kho", "ዀ": "khwa",
-    
-    # ወ Series
-    "ወ": "we", "ዉ": "wu", "ዊ": "wi", "ዋ": "wa", "ዌ": "we", "ው": "w", "ዎ": "wo", "ዏ": "wwa",
-    
-    # ዐ Series (glottal)
-    "ዐ": "a", "ዑ": "u", "ዒ": "i", "ዓ": "a", "ዔ": "e", "ዕ": "", "ዖ": "o", "዗": "wa",
-    
-    # ዘ Series
-    "ዘ": "ze", "ዙ": "zu", "ዚ": "zi", "ዛ": "za", "ዜ": "ze", "ዝ": "z", "ዞ": "zo", "ዟ": "zwa",
-    
-    # ዠ Series
-    "ዠ": "zhe", "ዡ": "zhu", "ዢ": "zhi", "ዣ": "zha", "ዤ": "zhe", "ዥ": "zh", "ዦ": "zho", "ዧ": "zhwa",
-    
-    # የ Series
-    "የ": "ye", "ዩ": "yu", "ዪ": "yi", "ያ": "ya", "ዬ": "ye", "ይ": "y", "ዮ": "yo", "ዯ": "ywa",
-    
-    # ደ Series
-    "ደ": "de", "ዱ": "du", "ዲ": "di", "ዳ": "da", "ዴ": "de", "ድ": "d", "ዶ": "do", "ዷ": "dwa",
-    
-    # ጀ Series
-    "ጀ": "je", "ጁ": "ju", "ጂ": "ji", "ጃ": "ja", "ጄ": "je", "ጅ": "j", "ጆ": "jo", "ጇ": "jwa",
-    
-    # ገ Series
-    "ገ": "ge", "ጉ": "gu", "ጊ": "gi", "ጋ": "ga", "ጌ": "ge", "ግ": "g", "ጎ": "go", "ጏ": "gwa",
-    
-    # ጠ Series
-    "ጠ": "te", "ጡ": "tu", "ጢ": "ti", "ጣ": "ta", "ጤ": "te", "ጥ": "t", "ጦ": "to", "ጧ": "twa",
-    
-    # ጨ Series
-    "ጨ": "che", "ጩ": "chu", "ጪ": "chi", "ጫ": "cha", "ጬ": "che", "ጭ": "ch", "ጮ": "cho", "ጯ": "chwa",
-    
-    # ጰ Series
-    "ጰ": "pe", "ጱ": "pu", "ጲ": "pi", "ጳ": "pa", "ጴ": "pe", "ጵ": "p", "ጶ": "po", "ጷ": "pwa",
-    
-    # ጸ Series
-    "ጸ": "tse", "ጹ": "tsu", "ጺ": "tsi", "ጻ": "tsa", "ጼ": "tse", "ጽ": "ts", "ጾ": "tso", "ጿ": "tswa",
-    
-    # ፀ Series  
-    "ፀ": "tse", "ፁ": "tsu", "ፂ": "tsi", "ፃ": "tsa", "ፄ": "tse", "ፅ": "ts", "ፆ": "tso", "ፇ": "tswa",
-    
-    # ፈ Series
-    "ፈ": "fe", "ፉ": "fu", "ፊ": "fi", "ፋ": "fa", "ፌ": "fe", "ፍ": "f", "ፎ": "fo", "ፏ": "fwa",
-    
-    # ፐ Series
-    "ፐ": "pe", "ፑ": "pu", "ፒ": "pi", "ፓ": "pa", "ፔ": "pe", "ፕ": "p", "ፖ": "po", "ፗ": "pwa",
-    
-    # Punctuation and special characters
-    "።": ".", "፣": ",", "፤": ";", "፥": ":", "፦": "::", "፧": "?", "፨": "!", "፠": " ",
-    " ": " ", "\n": "\n", "\r": "\n", "\r\n": "\n", "\t": " ",
-    # Rare jawns
-    "ኵ":"kwi", "ኧ": "e","ቋ": "qwa", "ቓ": "qwa", "ጓ": "gwa", "ጕ": "gwi", "ኋ": "hwa", "ዃ": "hwa", "ቒ": "qwi", "ኊ": "khwi", "ጚ": "jji",
-
-    # Numbers
-    "፩": "1", "፪": "2", "፫": "3", "፬": "4", "፭": "5", "፮": "6", "፯": "7", "፰": "8", "፱": "9", "፲": "10",
-}
-
-# Enhanced consonant cluster rules
-CONSONANT_CLUSTERS = {
-    # Common patterns
-    'mgb': 'migib',     # ምግብ
-    'lj': 'lij',        # ልጅ  
-    'nkb': 'nikib',     # እንክብ
-    'str': 'sitir',     # ስትር
-    'bst': 'bist',      # በስት
-    'shr': 'shir',      # ሽር
-}
-
-# Prefixes that should get apostrophes
-PREFIXES_WITH_APOSTROPHE = ['le', 'ye', 'be', 'ke', 'ma', 'me', 'e', 'a', 'te', 's', 'en', 'ya', 'y']
-
-def has_amharic_content(text):
-    """Check if text contains Amharic characters."""
-    if not text:
-        return False
-    
-    # Check for any Amharic Unicode ranges
-    for char in text:
-        # Ethiopic script Unicode range (U+1200–U+137F)
-        if '\u1200' <= char <= '\u137F':
-            return True
-    return False
-
-def transliterate_amharic(amharic_text):
-    """Transliterate Amharic text while preserving original formatting (spacing, indentation, line breaks)."""
-    if not amharic_text:
-        return ""
-
-    result = []
-    for char in amharic_text:
-        transliterated_char = AMHARIC_MAP.get(char, char)
-        result.append(transliterated_char)
-
-    # Don't join with ' '.join — just join directly to preserve spacing
-    transliterated = ''.join(result)
-
-    # Now apply post-processing rules, but avoid stripping formatting
-    return apply_post_processing_rules_preserving_formatting(transliterated)
-
-def apply_post_processing_rules_preserving_formatting(text):
-    """Post-process text while preserving all original spacing and line breaks."""
-    # Do NOT collapse whitespace
-    # Instead process word-by-word while keeping spacing/indentation
-
-    tokens = re.split(r'(\s+)', text)  # Keeps all spaces/newlines/tabs as separate tokens
-    processed_tokens = []
-
-    for token in tokens:
-        if not token.strip():  # It's just whitespace (space, tab, newline), preserve as is
-            processed_tokens.append(token)
-        else:
-            word = process_word_structure(token)
-            word = apply_prefix_apostrophe_rules(word)
-            processed_tokens.append(word)
+# Bounds for the inline query caches (entries, least recently used evicted first)
+INLINE_CACHE_SIZE = 4096
+INLINE_USER_PREFIX_LIMIT = 10000
 
-    return ''.join(processed_tokens)
-
-
-def apply_post_processing_rules(text):
-    """Apply post-processing rules for better transliteration."""
-    # Remove extra spaces
-    text = ' '.join(text.split())
-    
-    # Apply consonant cluster rules
-    for pattern, replacement in CONSONANT_CLUSTERS.items():
-        text = text.replace(pattern, replacement)
-    
-    # Split text more carefully - handle compound words
-    # Look for word boundaries (spaces, punctuation, numbers)
-    import re
-    words = re.split(r'(\s+|[.,;:!?/\d]+)', text)
-    processed_words = []
-    
-    for word in words:
-        # Skip whitespace and punctuation
-        if not word or word.isspace() or not any(c.isalpha() for c in word):
-            processed_words.append(word)
-            continue
-            
-        # Process the word
-        processed_word = process_word_structure(word)
-        # Apply prefix apostrophe rules only to actual words
-        if len(processed_word) > 1 and any(c.isalpha() for c in processed_word):
-            processed_word = apply_prefix_apostrophe_rules(processed_word)
-        processed_words.append(processed_word)
-    
-    return ''.join(processed_words)
+# Handler and Bot API instrumentation, exposed on the metrics endpoint (METRICS_PORT)
+HANDLER_SECONDS = metrics.Histogram('bot_handler_seconds', 'Time spent handling one update, by handler.')
+HANDLER_ERRORS = metrics.Counter('bot_handler_errors_total', 'Errors raised or handled inside handlers, by handler.')
+UPDATES_IN_FLIGHT = metrics.Gauge('bot_updates_in_flight', 'Updates currently being handled, by handler.')
+TRANSLITERATION_SECONDS = metrics.Histogram(
+    'bot_transliteration_seconds', 'Time spent transliterating inside handlers, by handler and execution path.'
+)
+INPUT_CHARS = metrics.Histogram(
+    'bot_input_chars', 'Size of transliterated inputs in characters, by handler.', buckets=metrics.SIZE_BUCKETS
+)
+TRANSLITERATION_DISPATCH = metrics.Counter(
+    'bot_transliteration_dispatch_total', 'Transliterations by execution path (inline, thread or process).'
+)
+TRANSLITERATION_TIMEOUTS = metrics.Counter(
+    'bot_transliteration_timeouts_total', 'Offloaded transliterations that exceeded the timeout.'
+)
+DOCUMENT_BYTES = metrics.Histogram(
+    'bot_document_bytes', 'Size of uploaded documents in bytes.', buckets=metrics.SIZE_BUCKETS
+)
+BOT_API_SECONDS = metrics.Histogram('bot_api_request_seconds', 'Bot API round-trip time, by API method.')
+BOT_API_POOL_WAIT_SECONDS = metrics.Histogram(
+    'bot_api_pool_wait_seconds', 'Time Bot API calls waited for a pooled connection, by pool.'
+)
+BOT_API_POOL_TIMEOUTS = metrics.Counter(
+    'bot_api_pool_timeouts_total', 'Bot API calls that gave up waiting for a pooled connection, by pool.'
+)
 
-def apply_prefix_apostrophe_rules(word):
-    """Apply prefix apostrophe rules to a word."""
-    if not word:
-        return word
-    
-    # Check if word starts with any of the specified prefixes
-    # Sort prefixes by length (longest first) to avoid partial matches
-    sorted_prefixes = sorted(PREFIXES_WITH_APOSTROPHE, key=len, reverse=True)
-    
-    for prefix in sorted_prefixes:
-        if word.startswith(prefix) and len(word) > len(prefix):
-            # Make sure the prefix is actually a complete prefix (not part of a longer word)
-            rest_of_word = word[len(prefix):]
-            if rest_of_word:  # There must be something after the prefix
-                # Add apostrophe after the prefix
-                new_word = prefix + "'" + rest_of_word
-                
-                # Check if there's an 'i' right after the apostrophe that should be deleted
-                # The 'i' should be deleted if it's not the first letter in the original word
-                if (len(rest_of_word) > 0 and 
-                    rest_of_word[0] == 'i' and 
-                    len(prefix) > 0):  # Ensure the 'i' is not the first letter
-                    # Delete the 'i'
-                    new_word = prefix + "'" + rest_of_word[1:]
-                
-                return new_word
-    
-    return word
+# Bot API HTTP clients. Outbound calls (sendMessage, editMessageText,
+# answerInlineQuery, ...) and getUpdates have separate connection pools, so a
+# long poll never holds a connection an answer is waiting for. Under bursts,
+# outbound calls queue for up to BOT_API_POOL_TIMEOUT seconds for a free
+# connection instead of failing; bot_api_pool_wait_seconds shows how long.
+# Idle connections are kept open for BOT_API_KEEPALIVE_EXPIRY seconds.
+# BOT_API_HTTP_VERSION=2 multiplexes calls over fewer connections and needs
+# python-telegram-bot[http2]. getUpdates is never concurrent, so its pool holds
+# one connection; its read timeout is added to the long-poll timeout.
+BOT_API_POOL_SIZE = int(os.getenv('BOT_API_POOL_SIZE', 256))
+# Unset keeps as many idle connections as the pool holds; 0 disables keep-alive
+BOT_API_KEEPALIVE_CONNECTIONS = (
+    int(os.environ['BOT_API_KEEPALIVE_CONNECTIONS']) if os.getenv('BOT_API_KEEPALIVE_CONNECTIONS') else None
+)
+BOT_API_KEEPALIVE_EXPIRY = float(os.getenv('BOT_API_KEEPALIVE_EXPIRY', 30))
+BOT_API_CONNECT_TIMEOUT = float(os.getenv('BOT_API_CONNECT_TIMEOUT', 5))
+BOT_API_READ_TIMEOUT = float(os.getenv('BOT_API_READ_TIMEOUT', 5))
+BOT_API_WRITE_TIMEOUT = float(os.getenv('BOT_API_WRITE_TIMEOUT', 5))
+BOT_API_POOL_TIMEOUT = float(os.getenv('BOT_API_POOL_TIMEOUT', 10))
+BOT_API_HTTP_VERSION = os.getenv('BOT_API_HTTP_VERSION', '1.1')
+POLL_READ_TIMEOUT = float(os.getenv('POLL_READ_TIMEOUT', 10))
+POLL_WRITE_TIMEOUT = float(os.getenv('POLL_WRITE_TIMEOUT', 10))
+
+# Uploaded documents are transliterated on an executor instead of the event loop, so
+# one huge file can't stall every other update. Text messages (at most 4096 characters)
+# and inline queries (at most 256) stay on the loop: they take well under a millisecond,
+# less than a round trip to a worker. "process" is the default because
+# str.translate/re.sub hold the GIL and would still block the loop from a thread.
+# Offloaded work that exceeds the timeout (seconds) fails the update.
+TRANSLITERATION_EXECUTOR = os.getenv('TRANSLITERATION_EXECUTOR', 'process')
+TRANSLITERATION_WORKERS = int(os.getenv('TRANSLITERATION_WORKERS', 0)) or None
+TRANSLITERATION_TIMEOUT = float(os.getenv('TRANSLITERATION_TIMEOUT', 30))
+
+# Results longer than Telegram's message limit are sent as several messages, cut at
+# whitespace. Incoming text is capped at the same limit, so the whole result is ready
+# within a millisecond or two; the first part goes out at once and the rest follow
+# MESSAGE_PART_INTERVAL seconds apart to stay under the per-chat rate limit.
+MESSAGE_MAX_CHARS = MessageLimit.MAX_TEXT_LENGTH
+MESSAGE_PART_INTERVAL = float(os.getenv('MESSAGE_PART_INTERVAL', 1.0))
+
+# The transliteration pipeline caches output per word. With WORD_CACHE_PATH set, the
+# caches are loaded from that SQLite file at startup (by process pool workers too),
+# saved every WORD_CACHE_SAVE_INTERVAL seconds and once more at shutdown.
+WORD_CACHE_PATH = os.getenv('WORD_CACHE_PATH')
+WORD_CACHE_SAVE_INTERVAL = float(os.getenv('WORD_CACHE_SAVE_INTERVAL', 300))
+
+def _word_cache_samples(key):
+    return [({'scheme': name}, stats[key]) for name, stats in word_cache_stats().items()]
+
+# Word cache statistics of the bot process (process pool workers keep their own caches)
+WORD_CACHE_HITS = metrics.CallbackMetric(
+    'bot_word_cache_hits_total', 'Word cache hits, by scheme.', lambda: _word_cache_samples('hits'), type_name='counter'
+)
+WORD_CACHE_MISSES = metrics.CallbackMetric(
+    'bot_word_cache_misses_total', 'Word cache misses, by scheme.', lambda: _word_cache_samples('misses'), type_name='counter'
+)
+WORD_CACHE_ENTRIES = metrics.CallbackMetric(
+    'bot_word_cache_entries', 'Words currently cached, by scheme.', lambda: _word_cache_samples('size')
+)
 
-def process_word_structure(word):
-    """Process individual word structure for better readability."""
-    if len(word) <= 1:
-        return word
-        
-    # Handle specific patterns
-    processed = word
-    
-    # Don't remove 'e' from እ at the beginning - it's important
-    # Only remove it in specific contexts
-    
-    # Handle consonant-vowel patterns more carefully
-    if len(processed) >= 3:
-        # Insert vowels in consonant clusters if needed, but be more conservative
-        new_word = ""
-        i = 0
-        while i < len(processed):
-            new_word += processed[i]
-            
-            # Look ahead for consonant clusters, but be more selective
-            if (i < len(processed) - 2 and 
-                processed[i] not in 'aeiou\'' and 
-                processed[i+1] not in 'aeiou\'' and 
-                processed[i+2] not in 'aeiou\''):
-                # Only insert 'i' for specific patterns, not all clusters
-                cluster = processed[i:i+3]
-                if cluster not in ['ndr', 'mpl', 'str', 'shr', 'nkb', 'mgb', 'lnk']:
-                    # Be even more conservative - only add 'i' for very specific cases
-                    pass  # Skip automatic 'i' insertion for now
-            i += 1
-        processed = new_word
-    
-    return processed
+# Uploaded documents are streamed to a temporary file, transliterated chunk by chunk
+# on the executor and sent back as a file, so memory is bounded by the chunk size.
+# Bots can't download files larger than 20 MB from the Bot API.
+DOCUMENT_EXTENSIONS = ('txt', 'srt')
+DOCUMENT_MAX_BYTES = 20 * 1024 * 1024
+DOCUMENT_CHUNK_BYTES = 64 * 1024
+DOCUMENT_DOWNLOAD_TIMEOUT = float(os.getenv('DOCUMENT_DOWNLOAD_TIMEOUT', 60))
+
+def inline_result_id(kind, query):
+    """Deterministic inline result id: the same query always gets the same ids."""
+    digest = hashlib.blake2b(query.encode('utf-8'), digest_size=16).hexdigest()
+    return f"{kind}-{digest}"
+
+# Static inline result sets, built once at startup and shared by every answer
+EMPTY_QUERY_RESULTS = [
+    InlineQueryResultArticle(
+        id="empty-instructions",
+        title="🇪🇹 Amharic Transliterator",
+        description="Type Amharic text to transliterate...",
+        input_message_content=InputTextMessageContent(
+            message_text="Type some Amharic text after @amharic_transliterator_bot to transliterate it!\n\nExample: @amharic_transliterator_bot ሰላም"
+        )
+    ),
+    InlineQueryResultArticle(
+        id="empty-example",
+        title="📝 Example: ሰላም",
+        description="Example transliteration",
+        input_message_content=InputTextMessageContent(
+            message_text="s'elam"
+        )
+    )
+]
+
+NO_AMHARIC_RESULTS = [
+    InlineQueryResultArticle(
+        id="no-amharic",
+        title="⚠️ No Amharic Detected",
+        description="Please type some Amharic text to transliterate",
+        input_message_content=InputTextMessageContent(
+            message_text="Please type some Amharic text to transliterate. Example: ሰላም"
+        )
+    ),
+    # Provide example
+    InlineQueryResultArticle(
+        id="no-amharic-example",
+        title="📚 Example: ሰላም",
+        description="Try typing: ሰላም",
+        input_message_content=InputTextMessageContent(
+            message_text="s'elam"
+        )
+    )
+]
+
+# "Chat with bot" button shown above inline results
+INLINE_HELP_BUTTON = InlineQueryResultsButton(text="💬 Chat with bot", start_parameter="inline_help")
+
+ERROR_RESULTS = [
+    InlineQueryResultArticle(
+        id="error",
+        title="❌ Error",
+        description="Something went wrong. Please try again.",
+        input_message_content=InputTextMessageContent(
+            message_text="Sorry, there was an error processing your request. Please try again or contact support."
+        )
+    )
+]
 
 def create_inline_results(original_query, transliterated, has_amharic):
     """Create comprehensive inline results with multiple options."""
@@ -290,7 +222,7 @@ def create_inline_results(original_query, transliterated, has_amharic):
         # Primary result - clean transliteration
         results.append(
             InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
+                id=inline_result_id('clean', original_query),
                 title=f"✅ {transliterated}",
                 description=f"Transliterated: {original_query}",
                 input_message_content=InputTextMessageContent(
@@ -302,7 +234,7 @@ def create_inline_results(original_query, transliterated, has_amharic):
         # Alternative result - with original text
         results.append(
             InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
+                id=inline_result_id('original', original_query),
                 title=f"📝 With Original",
                 description=f"{original_query} → {transliterated}",
                 input_message_content=InputTextMessageContent(
@@ -314,7 +246,7 @@ def create_inline_results(original_query, transliterated, has_amharic):
         # Code format result (useful for sharing)
         results.append(
             InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
+                id=inline_result_id('code', original_query),
                 title=f"💻 Code Format",
                 description=f"`{transliterated}`",
                 input_message_content=InputTextMessageContent(
@@ -329,7 +261,7 @@ def create_inline_results(original_query, transliterated, has_amharic):
             preview = transliterated[:47] + "..."
             results.append(
                 InlineQueryResultArticle(
-                    id=str(uuid.uuid4()),
+                    id=inline_result_id('preview', original_query),
                     title=f"📄 Preview",
                     description=f"Short preview: {preview}",
                     input_message_content=InputTextMessageContent(
@@ -339,33 +271,277 @@ def create_inline_results(original_query, transliterated, has_amharic):
             )
     
     else:
-        # No Amharic detected
-        results.append(
-            InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
-                title="⚠️ No Amharic Detected",
-                description="Please type some Amharic text to transliterate",
-                input_message_content=InputTextMessageContent(
-                    message_text="Please type some Amharic text to transliterate. Example: ሰላም"
-                )
+        # No Amharic: offer the reverse direction when the query is Latin text
+        geez = transliterate_to_geez(original_query)
+        if not has_amharic_content(geez):
+            return NO_AMHARIC_RESULTS
+        return create_reverse_inline_results(original_query, geez)
+    
+    return results
+
+def create_reverse_inline_results(original_query, geez):
+    """Inline results for a Latin query transliterated to Ge'ez."""
+    return [
+        InlineQueryResultArticle(
+            id=inline_result_id('geez', original_query),
+            title=f"✅ {geez}",
+            description=f"Ge'ez: {original_query}",
+            input_message_content=InputTextMessageContent(
+                message_text=geez
             )
-        )
-        
-        # Provide example
-        results.append(
-            InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
-                title="📚 Example: ሰላም",
-                description="Try typing: ሰላም",
-                input_message_content=InputTextMessageContent(
-                    message_text="s'elam"
-                )
+        ),
+        InlineQueryResultArticle(
+            id=inline_result_id('geez-original', original_query),
+            title="📝 With Original",
+            description=f"{original_query} → {geez}",
+            input_message_content=InputTextMessageContent(
+                message_text=f"{original_query} → {geez}"
             )
+        ),
+    ]
+
+# Inline query caches: query -> results, and user_id -> (stable_prefix, transliterated, has_amharic)
+_inline_results_cache = OrderedDict()
+_inline_user_prefixes = OrderedDict()
+
+def _remember(cache, key, value, limit):
+    """Store a value in an OrderedDict used as an LRU cache, evicting the oldest entry."""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > limit:
+        cache.popitem(last=False)
+
+def transliterate_inline_query(query, user_id=None):
+    """Transliterate an inline query, reusing the user's previous query where possible.
+
+    Inline queries usually extend the previous one by a keystroke. Everything up
+    to the last whitespace is remembered per user, so only the words after the
+    remembered prefix are transliterated again.
+    """
+    if query and not query[-1].isspace():
+        cut = len(query) - len(query.rsplit(None, 1)[-1])
+    else:
+        cut = len(query)
+    if SOURCE_SEQUENCE_RULES.final_length(query[:cut]) < cut:
+        cut = 0  # A multi-codepoint sequence may straddle the cut; don't split here
+    stable, tail = query[:cut], query[cut:]
+
+    previous = _inline_user_prefixes.get(user_id) if user_id is not None else None
+    if previous is not None and stable.startswith(previous[0]):
+        prefix, prefix_transliterated, prefix_has_amharic = previous
+        new_transliterated, new_has_amharic = transliterate_with_detection(stable[len(prefix):])
+        stable_transliterated = prefix_transliterated + new_transliterated
+        stable_has_amharic = prefix_has_amharic or new_has_amharic
+    else:
+        stable_transliterated, stable_has_amharic = transliterate_with_detection(stable)
+
+    if user_id is not None:
+        _remember(
+            _inline_user_prefixes, user_id,
+            (stable, stable_transliterated, stable_has_amharic), INLINE_USER_PREFIX_LIMIT
         )
-    
+
+    tail_transliterated, tail_has_amharic = transliterate_with_detection(tail)
+    return stable_transliterated + tail_transliterated, stable_has_amharic or tail_has_amharic
+
+def get_inline_results(query, user_id=None):
+    """Return inline results for a query from the LRU cache, computing them on a miss."""
+    results = _inline_results_cache.get(query)
+    if results is not None:
+        _inline_results_cache.move_to_end(query)
+        return results
+
+    transliterated, has_amharic = transliterate_inline_query(query, user_id)
+    results = create_inline_results(query, transliterated, has_amharic)
+    _remember(_inline_results_cache, query, results, INLINE_CACHE_SIZE)
     return results
 
+# Created on first use; see get_transliteration_executor()
+_transliteration_executor = None
+
+def get_transliteration_executor():
+    """Return the shared executor for large transliterations, creating it lazily."""
+    global _transliteration_executor
+    if _transliteration_executor is None:
+        if TRANSLITERATION_EXECUTOR == 'thread':
+            _transliteration_executor = ThreadPoolExecutor(
+                max_workers=TRANSLITERATION_WORKERS, thread_name_prefix='transliterate'
+            )
+        else:
+            _transliteration_executor = ProcessPoolExecutor(
+                max_workers=TRANSLITERATION_WORKERS,
+                initializer=warm_word_caches if WORD_CACHE_PATH else None,
+                initargs=(WORD_CACHE_PATH,) if WORD_CACHE_PATH else ()
+            )
+    return _transliteration_executor
+
+def shutdown_transliteration_executor():
+    global _transliteration_executor
+    if _transliteration_executor is not None:
+        _transliteration_executor.shutdown(wait=False, cancel_futures=True)
+        _transliteration_executor = None
+
+async def run_off_loop(call, handler, description):
+    """Run a picklable zero-argument callable on the executor with the transliteration timeout."""
+    path = 'thread' if TRANSLITERATION_EXECUTOR == 'thread' else 'process'
+    TRANSLITERATION_DISPATCH.inc(handler=handler, path=path)
+    logger.info(f"Offloading {description} transliteration for {handler} to {path} executor")
+
+    loop = asyncio.get_running_loop()
+    with TRANSLITERATION_SECONDS.time(handler=handler, path=path):
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(get_transliteration_executor(), call),
+                timeout=TRANSLITERATION_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            TRANSLITERATION_TIMEOUTS.inc(handler=handler, path=path)
+            logger.warning(f"Transliteration of {description} for {handler} timed out on {path} executor")
+            raise
+
+def run_on_loop(call, handler, text):
+    """Run ``call``, which transliterates ``text``, on the event loop and record it for ``handler``."""
+    INPUT_CHARS.observe(len(text), handler=handler)
+    TRANSLITERATION_DISPATCH.inc(handler=handler, path='inline')
+    with TRANSLITERATION_SECONDS.time(handler=handler, path='inline'):
+        return call()
+
+def message_cut(text, limit=MESSAGE_MAX_CHARS):
+    """Length of the first message-sized part of ``text``: up to its last whitespace within ``limit``."""
+    if len(text) <= limit:
+        return len(text)
+    cut = max(text.rfind(' ', 0, limit), text.rfind('\n', 0, limit))
+    # A single run without whitespace longer than a message is cut where it must be
+    return cut + 1 if cut > 0 else limit
+
+def split_message(text, limit=MESSAGE_MAX_CHARS):
+    """Split finished text into message-sized parts, skipping parts that are only whitespace."""
+    while text:
+        cut = message_cut(text, limit)
+        part, text = text[:cut], text[cut:]
+        if part.strip():
+            yield part
+
+async def send_part(send, text):
+    """Send one part, waiting out a flood-control RetryAfter once."""
+    try:
+        return await send(text)
+    except RetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        return await send(text)
+
+async def send_remaining_parts(message, parts):
+    """Reply with each remaining part in order, MESSAGE_PART_INTERVAL after the previous one."""
+    for part in parts:
+        await asyncio.sleep(MESSAGE_PART_INTERVAL)
+        await send_part(message.reply_text, part)
+
+async def download_document(telegram_file, path):
+    """Stream a Telegram file to ``path`` without holding it in memory."""
+    if not telegram_file.file_path.startswith(('http://', 'https://')):
+        # A local Bot API server returns a path on this machine instead of a URL
+        await asyncio.to_thread(shutil.copyfile, telegram_file.file_path, path)
+        return
+
+    async with httpx.AsyncClient(timeout=DOCUMENT_DOWNLOAD_TIMEOUT) as client:
+        async with client.stream('GET', telegram_file.file_path) as response:
+            response.raise_for_status()
+            with open(path, 'wb') as target:
+                async for chunk in response.aiter_bytes(DOCUMENT_CHUNK_BYTES):
+                    target.write(chunk)
+
+async def save_word_caches_periodically(path, interval):
+    """Persist the word caches every ``interval`` seconds so a restarted bot starts warm."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(persist_word_caches, path)
+        except Exception as e:
+            logger.warning(f"Saving word caches to {path} failed: {e}")
+
+def instrumented(handler):
+    """Record latency, in-flight count and escaped errors for a bot handler."""
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        UPDATES_IN_FLIGHT.inc(handler=name)
+        start_time = time.perf_counter()
+        try:
+            return await handler(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - start_time, handler=name)
+            UPDATES_IN_FLIGHT.dec(handler=name)
+
+    return wrapper
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that records the round-trip time of every Bot API call.
+
+    It also records how long each call waited for a pooled connection, in
+    metrics labelled with ``pool``. The library keeps as many idle
+    connections as the pool holds, for httpx's default 5 seconds;
+    ``keepalive_connections`` and ``keepalive_expiry`` override that.
+    """
+
+    def __init__(self, pool, connection_pool_size=1, keepalive_connections=None, keepalive_expiry=5.0, **kwargs):
+        # Set before the library builds its client, which calls _build_client
+        self.pool = pool
+        self._limits = httpx.Limits(
+            max_connections=connection_pool_size,
+            max_keepalive_connections=connection_pool_size if keepalive_connections is None else keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+
+    def _build_client(self):
+        # The library's client settings (timeouts, proxies, HTTP version) with our limits and hook
+        return httpx.AsyncClient(**{
+            **self._client_kwargs, 'limits': self._limits, 'event_hooks': {'request': [self._trace_pool_wait]},
+        })
+
+    async def _trace_pool_wait(self, request):
+        started = time.perf_counter()
+        waiting = True
+
+        async def trace(event_name, info):
+            nonlocal waiting
+            # The first trace event comes from the connection the pool handed out
+            if waiting:
+                waiting = False
+                BOT_API_POOL_WAIT_SECONDS.observe(time.perf_counter() - started, pool=self.pool)
+
+        request.extensions = {**request.extensions, 'trace': trace}
+
+    async def do_request(self, url, method, *args, **kwargs):
+        # url ends with the API method, e.g. .../bot<token>/sendMessage
+        with BOT_API_SECONDS.time(method=url.rsplit('/', 1)[-1]):
+            try:
+                return await super().do_request(url, method, *args, **kwargs)
+            except TimedOut as e:
+                if isinstance(e.__cause__, httpx.PoolTimeout):
+                    BOT_API_POOL_TIMEOUTS.inc(pool=self.pool)
+                raise
+
+def bot_api_request(pool, connection_pool_size, read_timeout, write_timeout):
+    """An InstrumentedRequest with the BOT_API_* connection settings."""
+    return InstrumentedRequest(
+        pool,
+        connection_pool_size=connection_pool_size,
+        keepalive_connections=BOT_API_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=BOT_API_KEEPALIVE_EXPIRY,
+        http_version=BOT_API_HTTP_VERSION,
+        connect_timeout=BOT_API_CONNECT_TIMEOUT,
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
+        pool_timeout=BOT_API_POOL_TIMEOUT,
+    )
+
 # Bot handlers
+@instrumented
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /start is issued."""
     welcome_message = """
@@ -395,6 +571,7 @@ Try it now! Send me some Amharic text 👇
     """
     await update.message.reply_text(welcome_message, parse_mode=ParseMode.MARKDOWN)
 
+@instrumented
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /help is issued."""
     help_text = """
@@ -404,10 +581,13 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 • `/start` - Start the bot
 • `/help` - Show this help message  
 • `/about` - About this bot
+• `/scheme` - Show or change the romanization scheme for this chat
 
 *How to use:*
 1. *Direct message*: Send Amharic text directly to this bot
 2. *Inline mode*: Type `@amharic_transliterator_bot` in any chat followed by Amharic text.
+   Type Latin text instead (e.g. `selam`) to get it back in Ge'ez script.
+3. *Documents*: Send a UTF-8 `.txt` or `.srt` file (up to 20 MB) and get a transliterated file back.
 
 *Inline Features:*
 • Multiple result options (clean, with original, code format)
@@ -424,6 +604,7 @@ Happy transliterating! 🎉
     """
     await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
 
+@instrumented
 async def about(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send information about the bot."""
     about_text = """
@@ -441,110 +622,243 @@ This bot transliterates Amharic (አማርኛ) text to Latin script(a'margna), m
     """
     await update.message.reply_text(about_text, parse_mode=ParseMode.MARKDOWN)
 
+@instrumented
+async def scheme_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show or set the romanization scheme used for this chat's messages."""
+    names = available_schemes()
+    current = context.chat_data.get('scheme', DEFAULT_SCHEME_NAME)
+    if not context.args:
+        await update.message.reply_text(
+            f"Current scheme: {current}\nAvailable: {', '.join(names)}\nUsage: /scheme <name>"
+        )
+        return
+
+    name = context.args[0].lower()
+    if name not in names:
+        await update.message.reply_text(f"Unknown scheme '{name}'. Available: {', '.join(names)}")
+        return
+    try:
+        # Load (and compile, if needed) the table now so a bad table fails here, not per message
+        get_scheme(name)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading scheme {name}: {e}")
+        HANDLER_ERRORS.inc(handler='scheme_command')
+        await update.message.reply_text(f"Sorry, the '{name}' scheme is unavailable right now.")
+        return
+    context.chat_data['scheme'] = name
+    await update.message.reply_text(f"Messages in this chat will now use the {name} scheme.")
+
+@instrumented
 async def transliterate_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle regular text messages and transliterate them."""
     if not update.message.text:
         return
     
     try:
-        # Send immediate "processing" message
-        processing_message = await update.message.reply_text("⏳ Transliterating...")
-        
-        # Transliterate the message
         original_text = update.message.text
-        transliterated = transliterate_amharic(original_text)
-        
-        # Check if there's any actual Amharic content to transliterate
-        has_amharic = has_amharic_content(original_text)
-        
-        if has_amharic and transliterated != original_text:
-            # Edit the processing message with the result
-            await processing_message.edit_text(transliterated)
-        else:
-            # Edit the processing message with a helpful message
-            await processing_message.edit_text(
+
+        # Transliterate the message and check for actual Amharic content in one pass
+        scheme = context.chat_data.get('scheme')
+        transliterated, has_amharic = run_on_loop(
+            functools.partial(transliterate_with_detection, original_text, scheme),
+            'transliterate_message', original_text
+        )
+        has_amharic = has_amharic and transliterated != original_text
+        # Transliteration can double the length, so the result may span several messages
+        parts = split_message(transliterated)
+
+        first_part = next(parts, None) if has_amharic else None
+        if first_part is None:
+            # Send a helpful message instead
+            first_part = (
                 "I didn't detect any Amharic text to transliterate. "
                 "Please send me some Amharic text! Example: ሰላም"
             )
+            parts = iter(())
+
+        # No "⏳ Transliterating..." placeholder: a message-sized input takes well under
+        # a millisecond, so the first reply already carries the result
+        await send_part(update.message.reply_text, first_part)
+        await send_remaining_parts(update.message, parts)
     except Exception as e:
         logger.error(f"Error transliterating message: {e}")
-        try:
-            await processing_message.edit_text(
-                "Sorry, I encountered an error while transliterating. Please try again."
-            )
-        except:
-            await update.message.reply_text(
-                "Sorry, I encountered an error while transliterating. Please try again."
+        HANDLER_ERRORS.inc(handler='transliterate_message')
+        await update.message.reply_text(
+            "Sorry, I encountered an error while transliterating. Please try again."
+        )
+
+@instrumented
+async def transliterate_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Transliterate an uploaded text document and send the result back as a file."""
+    document = update.message.document
+    if document.file_size and document.file_size > DOCUMENT_MAX_BYTES:
+        await update.message.reply_text(
+            f"Sorry, that file is too large. I can transliterate files up to {DOCUMENT_MAX_BYTES // (1024 * 1024)} MB."
+        )
+        return
+
+    stem, extension = os.path.splitext(document.file_name or 'document.txt')
+    try:
+        await update.message.chat.send_action(ChatAction.UPLOAD_DOCUMENT)
+        if document.file_size:
+            DOCUMENT_BYTES.observe(document.file_size)
+
+        with tempfile.TemporaryDirectory(prefix='transliterate-') as directory:
+            source_path = os.path.join(directory, 'source')
+            result_path = os.path.join(directory, 'result')
+            await download_document(await document.get_file(), source_path)
+
+            # Always on the executor: even a chunked pass over a large file takes a while
+            scheme = context.chat_data.get('scheme')
+            has_amharic = await run_off_loop(
+                functools.partial(transliterate_file, source_path, result_path, scheme=scheme),
+                'transliterate_document', f"{document.file_size or 0}-byte document"
             )
+            if not has_amharic:
+                await update.message.reply_text(
+                    "I didn't detect any Amharic text in that file. "
+                    "Please send a UTF-8 text file with some Amharic in it!"
+                )
+                return
+
+            with open(result_path, 'rb') as result:
+                await update.message.reply_document(result, filename=f"{stem}_latin{extension or '.txt'}")
+    except Exception as e:
+        # Don't log the download URL: it contains the bot token
+        logger.error(f"Error transliterating document: {type(e).__name__}")
+        HANDLER_ERRORS.inc(handler='transliterate_document')
+        await update.message.reply_text(
+            "Sorry, I encountered an error while transliterating that file. Please try again."
+        )
 
+@instrumented
 async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Enhanced inline query handler with better transliteration and multiple result options."""
     query = update.inline_query.query.strip()
     
+    # Results depend only on the query text, never on the user, so answers are sent
+    # with is_personal=False and Telegram's servers can serve them to everyone
+
     # If query is empty, show helpful instructions
     if not query:
-        results = [
-            InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
-                title="🇪🇹 Amharic Transliterator",
-                description="Type Amharic text to transliterate...",
-                input_message_content=InputTextMessageContent(
-                    message_text="Type some Amharic text after @amharic_transliterator_bot to transliterate it!\n\nExample: @amharic_transliterator_bot ሰላም"
-                )
-            ),
-            InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
-                title="📝 Example: ሰላም",
-                description="Example transliteration",
-                input_message_content=InputTextMessageContent(
-                    message_text="s'elam"
-                )
-            )
-        ]
-        
-        await update.inline_query.answer(results, cache_time=300, is_personal=True)
+        await update.inline_query.answer(EMPTY_QUERY_RESULTS, cache_time=300, is_personal=False)
         return
     
     try:
-        # Check if the query contains Amharic
-        has_amharic = has_amharic_content(query)
-        
-        # Transliterate the query using the same enhanced method as direct messages
-        transliterated = transliterate_amharic(query)
-        
-        # Create comprehensive results
-        results = create_inline_results(query, transliterated, has_amharic)
+        # Transliterate the query and create comprehensive results (cached per query,
+        # reusing the stable prefix of this user's previous query). Inline mode always
+        # uses the default scheme: its answers are shared between users
+        results = run_on_loop(
+            functools.partial(get_inline_results, query, update.inline_query.from_user.id), 'inline_query', query
+        )
         
         # Answer the inline query with enhanced options
         await update.inline_query.answer(
             results, 
             cache_time=300, 
-            is_personal=True,
-            switch_pm_text="💬 Chat with bot",
-            switch_pm_parameter="inline_help"
+            is_personal=False,
+            button=INLINE_HELP_BUTTON
         )
         
     except Exception as e:
         logger.error(f"Error in inline query: {e}")
+        HANDLER_ERRORS.inc(handler='inline_query')
         # Fallback error result
-        error_results = [
-            InlineQueryResultArticle(
-                id=str(uuid.uuid4()),
-                title="❌ Error",
-                description="Something went wrong. Please try again.",
-                input_message_content=InputTextMessageContent(
-                    message_text="Sorry, there was an error processing your request. Please try again or contact support."
-                )
-            )
-        ]
-        
         try:
-            await update.inline_query.answer(error_results, cache_time=30)
+            await update.inline_query.answer(ERROR_RESULTS, cache_time=30)
         except:
             pass  # If we can't even send the error, just log it
 
-def main() -> None:
-    """Start the bot."""
+def build_application(
+    bot_token, metrics_listen=None, metrics_port=None, base_url=None, base_file_url=None,
+    max_concurrent_updates=DEFAULT_MAX_CONCURRENT_UPDATES,
+    max_concurrent_updates_per_user=DEFAULT_MAX_CONCURRENT_UPDATES_PER_USER
+):
+    """Create the Application and register all handlers.
+
+    Updates are scheduled by a FairUpdateProcessor with the given global and
+    per-user concurrency limits. When ``metrics_port`` is given, a Prometheus
+    text endpoint is served on ``http://metrics_listen:metrics_port/metrics``
+    once the bot starts. Word caches are persisted when WORD_CACHE_PATH is set.
+    ``base_url`` and ``base_file_url`` override the Bot API endpoints.
+    """
+    background_tasks = []
+    metrics_servers = []
+
+    async def post_shutdown(application):
+        shutdown_transliteration_executor()
+        for task in background_tasks:
+            task.cancel()
+        for server in metrics_servers:
+            server.close()
+            await server.wait_closed()
+        if WORD_CACHE_PATH:
+            try:
+                persist_word_caches(WORD_CACHE_PATH)
+            except Exception as e:
+                logger.warning(f"Saving word caches to {WORD_CACHE_PATH} failed: {e}")
+
+    async def post_init(application):
+        if metrics_port:
+            metrics_servers.append(await metrics.start_metrics_server(metrics_listen or '127.0.0.1', metrics_port))
+            print(f"📈 Metrics available on http://{metrics_listen or '127.0.0.1'}:{metrics_port}/metrics")
+        if WORD_CACHE_PATH:
+            try:
+                loaded = await asyncio.to_thread(warm_word_caches, WORD_CACHE_PATH)
+                print(f"🔥 Loaded {loaded} cached words from {WORD_CACHE_PATH}")
+            except Exception as e:
+                logger.warning(f"Loading word caches from {WORD_CACHE_PATH} failed: {e}")
+            background_tasks.append(asyncio.create_task(
+                save_word_caches_periodically(WORD_CACHE_PATH, WORD_CACHE_SAVE_INTERVAL)
+            ))
+
+    # Create the Application with optimized settings. Both request objects time
+    # every Bot API call and its wait for a pooled connection.
+    builder = Application.builder().token(bot_token)
+    if base_url:
+        builder = builder.base_url(base_url)
+    if base_file_url:
+        builder = builder.base_file_url(base_file_url)
+    application = (
+        builder
+        .concurrent_updates(FairUpdateProcessor(max_concurrent_updates, max_concurrent_updates_per_user))
+        .request(bot_api_request('outbound', BOT_API_POOL_SIZE, BOT_API_READ_TIMEOUT, BOT_API_WRITE_TIMEOUT))
+        .get_updates_request(bot_api_request('updates', 1, POLL_READ_TIMEOUT, POLL_WRITE_TIMEOUT))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+
+    # Register handlers
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("about", about))
+    application.add_handler(CommandHandler("scheme", scheme_command))
+    application.add_handler(InlineQueryHandler(inline_query))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, transliterate_message))
+    document_filter = filters.Document.FileExtension(DOCUMENT_EXTENSIONS[0])
+    for extension in DOCUMENT_EXTENSIONS[1:]:
+        document_filter |= filters.Document.FileExtension(extension)
+    application.add_handler(MessageHandler(document_filter, transliterate_document))
+    return application
+
+def main(
+    mode=None, listen=None, port=None, webhook_url=None, url_path=None, secret_token=None,
+    metrics_listen=None, metrics_port=None
+) -> None:
+    """Start the bot.
+
+    Runs with long polling by default. Webhook mode is selected with
+    ``mode='webhook'`` or ``BOT_MODE=webhook``; every webhook setting falls back
+    to its environment variable (WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT or
+    PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN). The metrics endpoint is enabled
+    with ``metrics_port`` or METRICS_PORT (listening on METRICS_LISTEN, default
+    127.0.0.1). Concurrency limits come from MAX_CONCURRENT_UPDATES and
+    MAX_CONCURRENT_UPDATES_PER_USER; polling is tuned with POLL_INTERVAL,
+    POLL_TIMEOUT, POLL_READ_TIMEOUT and POLL_WRITE_TIMEOUT, and the Bot API
+    connection pools with the BOT_API_* settings. BOT_API_BASE_URL and BOT_API_BASE_FILE_URL point the bot at
+    another Bot API server (a local one, or benchmarks/fake_bot_api.py).
+    """
     # Get the bot token from environment variables
     BOT_TOKEN = os.getenv('BOT_TOKEN')
     
@@ -555,35 +869,95 @@ def main() -> None:
     if not BOT_TOKEN:
         print("❌ Please set your BOT_TOKEN environment variable!")
         return
-    
-    # Create the Application with optimized settings
-    application = (
-        Application.builder()
-        .token(BOT_TOKEN)
-        .concurrent_updates(True)
-        .build()
-    )
 
-    # Register handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("about", about))
-    application.add_handler(InlineQueryHandler(inline_query))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, transliterate_message))
+    mode = mode or os.getenv('BOT_MODE', 'polling')
+    if mode not in ('polling', 'webhook'):
+        print(f"❌ Unknown BOT_MODE {mode!r}, expected 'polling' or 'webhook'")
+        return
+
+    if mode == 'webhook':
+        webhook_url = webhook_url or os.getenv('WEBHOOK_URL')
+        if not webhook_url:
+            print("❌ Please set WEBHOOK_URL (the public HTTPS URL Telegram should post updates to)!")
+            return
+        secret_token = secret_token or os.getenv('WEBHOOK_SECRET_TOKEN')
+        if not secret_token:
+            print("⚠️ WEBHOOK_SECRET_TOKEN is not set; incoming webhook requests will not be verified!")
+
+    # Recompile scheme tables whose source changed, before any worker process reads them
+    for name in SCHEME_SOURCES:
+        refresh_scheme_table(name)
+
+    application = build_application(
+        BOT_TOKEN,
+        base_url=os.getenv('BOT_API_BASE_URL'),
+        base_file_url=os.getenv('BOT_API_BASE_FILE_URL'),
+        metrics_listen=metrics_listen or os.getenv('METRICS_LISTEN'),
+        metrics_port=int(metrics_port or os.getenv('METRICS_PORT') or 0),
+        max_concurrent_updates=int(os.getenv('MAX_CONCURRENT_UPDATES', DEFAULT_MAX_CONCURRENT_UPDATES)),
+        max_concurrent_updates_per_user=int(
+            os.getenv('MAX_CONCURRENT_UPDATES_PER_USER', DEFAULT_MAX_CONCURRENT_UPDATES_PER_USER)
+        )
+    )
 
     # Run the bot with optimized settings
     print("🚀 Starting Enhanced Amharic Transliterator Bot...")
     print("Bot is running! Send /start to begin.")
+
+    if mode == 'webhook':
+        # Telegram pushes updates to our HTTP server; requests whose
+        # X-Telegram-Bot-Api-Secret-Token header doesn't match are rejected
+        application.run_webhook(
+            listen=listen or os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+            port=int(port or os.getenv('WEBHOOK_PORT') or os.getenv('PORT') or 8443),
+            url_path=url_path if url_path is not None else os.getenv('WEBHOOK_PATH', 'telegram'),
+            webhook_url=webhook_url,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            bootstrap_retries=5
+        )
+        return
     
     # Start the bot with faster polling
     application.run_polling(
         allowed_updates=Update.ALL_TYPES,
-        poll_interval=0.5,
-        timeout=30,
-        bootstrap_retries=5,
-        read_timeout=10,
-        write_timeout=10
+        poll_interval=float(os.getenv('POLL_INTERVAL', 0.5)),
+        timeout=int(os.getenv('POLL_TIMEOUT', 30)),
+        bootstrap_retries=5
     )
 
+def cli(argv=None) -> None:
+    """Command-line entry point. Runs the bot when no command is given."""
+    parser = argparse.ArgumentParser(
+        prog='python -m mt_transliterator',
+        description='Amharic to Latin transliterator. Runs the Telegram bot when no command is given.'
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    add_offline_commands(subparsers)
+    bot_parser = subparsers.add_parser('bot', help='Run the Telegram bot (default)')
+    bot_parser.add_argument(
+        '--mode', choices=['polling', 'webhook'], default=None, help='Update delivery mode (default: $BOT_MODE or polling)'
+    )
+    bot_parser.add_argument('--listen', default=None, help='Webhook listen address (default: $WEBHOOK_LISTEN or 0.0.0.0)')
+    bot_parser.add_argument('--port', type=int, default=None, help='Webhook listen port (default: $WEBHOOK_PORT, $PORT or 8443)')
+    bot_parser.add_argument('--webhook-url', default=None, help='Public webhook URL registered with Telegram (default: $WEBHOOK_URL)')
+    bot_parser.add_argument('--url-path', default=None, help='Local path the webhook is served on (default: $WEBHOOK_PATH or telegram)')
+    bot_parser.add_argument('--secret-token', default=None, help='Webhook secret token (default: $WEBHOOK_SECRET_TOKEN)')
+    bot_parser.add_argument('--metrics-listen', default=None, help='Metrics listen address (default: $METRICS_LISTEN or 127.0.0.1)')
+    bot_parser.add_argument('--metrics-port', type=int, default=None, help='Serve /metrics on this port (default: $METRICS_PORT, off if unset)')
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'handler', None):
+        args.handler(args)
+    elif args.command == 'bot':
+        main(
+            mode=args.mode, listen=args.listen, port=args.port, webhook_url=args.webhook_url,
+            url_path=args.url_path, secret_token=args.secret_token,
+            metrics_listen=args.metrics_listen, metrics_port=args.metrics_port
+        )
+    else:
+        main()
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
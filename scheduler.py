@@ -0,0 +1,178 @@
+"""Fair, bounded update scheduling for the bot.
+
+``FairUpdateProcessor`` plugs into ``Application.builder().concurrent_updates()``
+and replaces unbounded concurrency with:
+
+* a global limit on updates processed at once,
+* a per-user limit, so one user can't take every slot,
+* round-robin queuing between users waiting for a slot, and
+* cancellation of a user's in-flight inline query as soon as a newer one from
+  the same user arrives (Telegram discards the older answer anyway).
+"""
+import asyncio
+import sys
+from collections import OrderedDict, deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+import metrics
+
+# Defaults match the library's concurrent_updates(True) pool of 256 updates
+DEFAULT_MAX_CONCURRENT_UPDATES = 256
+DEFAULT_MAX_CONCURRENT_UPDATES_PER_USER = 4
+
+UPDATES_QUEUED = metrics.Gauge('bot_scheduler_queued_updates', 'Updates waiting for a processing slot.')
+UPDATES_ACTIVE = metrics.Gauge('bot_scheduler_active_updates', 'Updates holding a processing slot.')
+STALE_INLINE_CANCELLED = metrics.Counter(
+    'bot_scheduler_stale_inline_queries_cancelled_total',
+    'Inline queries cancelled because the same user sent a newer one.'
+)
+
+def update_user_key(update):
+    """Key updates are scheduled by: the sending user, else the chat, else None."""
+    if isinstance(update, Update):
+        if update.effective_user is not None:
+            return update.effective_user.id
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+    return None
+
+class FairUpdateProcessor(BaseUpdateProcessor):
+    """Update processor with global and per-user limits and fair queuing.
+
+    The scheduling lives in ``do_process_update``, the library's extension
+    point. The base class's ``process_update`` also holds a semaphore around
+    it, but a FIFO semaphore would undo the round-robin order, so that one is
+    sized to never bind and the global limit is enforced here instead.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates=DEFAULT_MAX_CONCURRENT_UPDATES,
+        max_concurrent_updates_per_user=DEFAULT_MAX_CONCURRENT_UPDATES_PER_USER,
+    ):
+        # The base class sizes its semaphore from the max_concurrent_updates property,
+        # so that reads sys.maxsize until the base class is set up
+        self._max_updates = sys.maxsize
+        super().__init__(sys.maxsize)
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        self._max_updates = max_concurrent_updates
+        if max_concurrent_updates_per_user < 1:
+            raise ValueError("`max_concurrent_updates_per_user` must be a positive integer!")
+        self.max_concurrent_updates_per_user = max_concurrent_updates_per_user
+        self._active = 0
+        self._active_per_user = {}
+        # user key -> queue of waiting futures; iteration order is the round-robin order
+        self._waiting = OrderedDict()
+        # user key -> task running that user's latest inline query
+        self._inline_tasks = {}
+
+    @property
+    def max_concurrent_updates(self):
+        """The maximum number of updates processed at once."""
+        return self._max_updates
+
+    async def do_process_update(self, update, coroutine):
+        """Schedule one update fairly; supersede the user's previous inline query."""
+        key = update_user_key(update)
+        if not (isinstance(update, Update) and update.inline_query is not None):
+            await self._run(key, coroutine)
+            return
+
+        previous = self._inline_tasks.get(key)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            STALE_INLINE_CANCELLED.inc()
+
+        task = asyncio.ensure_future(self._run(key, coroutine))
+        # A task cancelled before its first step never enters _run, so close the
+        # update's coroutine here; closing one that already ran is a no-op
+        task.add_done_callback(lambda done: done.cancelled() and coroutine.close())
+        self._inline_tasks[key] = task
+        try:
+            await task
+        except asyncio.CancelledError:
+            if task.cancelled() and self._inline_tasks.get(key) is not task:
+                return  # Superseded by a newer query from the same user
+            task.cancel()
+            raise
+        finally:
+            if self._inline_tasks.get(key) is task:
+                del self._inline_tasks[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def _run(self, key, coroutine):
+        started = False
+        try:
+            await self._acquire(key)
+            try:
+                started = True
+                await coroutine
+            finally:
+                self._release(key)
+        finally:
+            if not started:
+                coroutine.close()  # Cancelled while queued; avoid "never awaited" warnings
+
+    async def _acquire(self, key):
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(key, deque()).append(future)
+        self._dispatch()
+        if future.done():
+            return
+
+        UPDATES_QUEUED.inc()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled; hand it back
+                self._release(key)
+            else:
+                queue = self._waiting.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiting[key]
+            raise
+        finally:
+            UPDATES_QUEUED.dec()
+
+    def _dispatch(self):
+        """Grant free slots to waiting users in round-robin order."""
+        while self._active < self.max_concurrent_updates and self._waiting:
+            for key in self._waiting:
+                if self._active_per_user.get(key, 0) < self.max_concurrent_updates_per_user:
+                    break
+            else:
+                return  # Everyone waiting is at their per-user limit
+
+            # Take the user's oldest waiter and move the user to the back of the line
+            queue = self._waiting.pop(key)
+            future = queue.popleft()
+            if queue:
+                self._waiting[key] = queue
+            if future.done():
+                continue
+
+            self._active += 1
+            self._active_per_user[key] = self._active_per_user.get(key, 0) + 1
+            UPDATES_ACTIVE.inc()
+            future.set_result(None)
+
+    def _release(self, key):
+        self._active -= 1
+        remaining = self._active_per_user[key] - 1
+        if remaining:
+            self._active_per_user[key] = remaining
+        else:
+            del self._active_per_user[key]
+        UPDATES_ACTIVE.dec()
+        self._dispatch()
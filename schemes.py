@@ -0,0 +1,195 @@
+"""Romanization schemes stored as compact, memory-mapped binary tables.
+
+A compiled table (``.amtr``) holds one output slot per codepoint of the
+Ethiopic block, as an offset array into a UTF-8 string pool, plus a short list
+of extra entries outside the block (whitespace, multi-codepoint sequences).
+A process only reads the table (through ``mmap``) and decodes it once into the
+dict ``str.translate`` needs; it never builds the source mapping. The header
+stores a digest of the source, and ``refresh_scheme_table`` recompiles tables
+whose source changed. That check builds the source, so it runs at deploy time
+(``compile-schemes``) and once when the bot starts, not in every worker.
+
+Layout (little-endian)::
+
+    header   magic "AMTR", u16 version, u16 flags, u32 base, u32 count, u32 extra_count,
+             16-byte digest of the source mapping and flags
+    offsets  (count + 1) x u32        output of base+i is pool[offsets[i]:offsets[i+1]]
+    extras   extra_count x 4 x u32    key offset, key length, value offset, value length
+    pool     UTF-8 bytes
+"""
+import hashlib
+import mmap
+import os
+import struct
+
+ETHIOPIC_BASE = 0x1200
+ETHIOPIC_SIZE = 0x180
+
+TABLE_MAGIC = b'AMTR'
+TABLE_VERSION = 2
+# Flag bit: apply the default scheme's prefix apostrophe word rules to the output
+FLAG_WORD_RULES = 1
+
+_HEADER = struct.Struct('<4sHHIII16s')
+_EXTRA = struct.Struct('<IIII')
+
+# Where compiled tables live; built on first use when missing
+SCHEME_TABLE_DIR = os.getenv('SCHEME_TABLE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'scheme_tables'
+)
+
+# Shared by every scheme: whitespace handling matches the default map
+COMMON_ENTRIES = {" ": " ", "\n": "\n", "\r": "\n", "\r\n": "\n", "\t": " "}
+
+# SERA (System for Ethiopic Representation in ASCII) consonants per series,
+# keyed by the first-order syllable
+SERA_CONSONANTS = {
+    "ሀ": "h", "ለ": "l", "ሐ": "H", "መ": "m", "ሠ": "`s", "ረ": "r", "ሰ": "s", "ሸ": "x",
+    "ቀ": "q", "ቐ": "Q", "በ": "b", "ቨ": "v", "ተ": "t", "ቸ": "c", "ኀ": "`h", "ነ": "n",
+    "ኘ": "N", "አ": "", "ከ": "k", "ኸ": "K", "ወ": "w", "ዐ": "`", "ዘ": "z", "ዠ": "Z",
+    "የ": "y", "ደ": "d", "ጀ": "j", "ገ": "g", "ጠ": "T", "ጨ": "C", "ጰ": "P", "ጸ": "S",
+    "ፀ": "`S", "ፈ": "f", "ፐ": "p", "ጘ": "G",
+}
+SERA_VOWELS = ("e", "u", "i", "a", "E", "", "o")
+# Series whose eighth form is the labialized -Wa syllable. The rarer -oa forms
+# (ሇ, ቇ, ኧ, ኯ, ...) are written -Wa as well, as the default scheme reads them
+SERA_LABIALIZED = "ሀለሐመሠረሰሸቀበቨተቸኀነኘአከወዘዠየደጀገጠጨጰጸፀፈፐ"
+# Series with a separate labialized block (qWe, qWi, qWa, qWE, qW) at these codepoints
+SERA_LABIALIZED_BLOCKS = {0x1248: "q", 0x1288: "`h", 0x12B0: "k", 0x12C0: "K", 0x1310: "g"}
+SERA_PUNCTUATION = {
+    "።": "::", "፣": ",", "፤": ";", "፥": ":", "፦": ":-", "፧": "?", "፠": " ", "፨": "!",
+    "፩": "1", "፪": "2", "፫": "3", "፬": "4", "፭": "5", "፮": "6", "፯": "7", "፰": "8", "፱": "9", "፲": "10",
+}
+
+def sera_mapping():
+    """Build the SERA mapping from its consonant and vowel grid.
+
+    It covers every Ethiopic character the default scheme maps except U+12D7,
+    which Unicode leaves unassigned.
+    """
+    mapping = dict(COMMON_ENTRIES)
+    for first, consonant in SERA_CONSONANTS.items():
+        base = ord(first)
+        for order, vowel in enumerate(SERA_VOWELS):
+            # Sixth order is the bare consonant; for vowel carriers it is an explicit I
+            mapping[chr(base + order)] = consonant + (vowel or ("" if consonant not in ("", "`") else "I"))
+        if first in SERA_LABIALIZED:
+            mapping[chr(base + 7)] = consonant + "Wa"
+    for base, consonant in SERA_LABIALIZED_BLOCKS.items():
+        for offset, vowel in ((0, "e"), (2, "i"), (3, "a"), (4, "E"), (5, "")):
+            mapping[chr(base + offset)] = consonant + "W" + vowel
+    mapping.update(SERA_PUNCTUATION)
+    return mapping
+
+# Scheme name -> (function returning its source mapping, apply default word rules)
+SCHEME_SOURCES = {
+    'sera': (sera_mapping, False),
+}
+
+def source_digest(mapping, word_rules=False):
+    """Digest of a source mapping and its flags, stored in the compiled table."""
+    source = repr((sorted(mapping.items()), bool(word_rules)))
+    return hashlib.blake2b(source.encode('utf-8'), digest_size=16).digest()
+
+def compile_scheme_table(mapping, path, word_rules=False):
+    """Compile a {source: latin} mapping into a binary table file at ``path``."""
+    pool = bytearray()
+    offsets = []
+    for index in range(ETHIOPIC_SIZE):
+        char = chr(ETHIOPIC_BASE + index)
+        offsets.append(len(pool))
+        # Unmapped codepoints store themselves, i.e. pass through unchanged
+        pool += mapping.get(char, char).encode('utf-8')
+    offsets.append(len(pool))
+
+    extras = []
+    for key, value in mapping.items():
+        if len(key) == 1 and ETHIOPIC_BASE <= ord(key) < ETHIOPIC_BASE + ETHIOPIC_SIZE:
+            continue
+        key_bytes, value_bytes = key.encode('utf-8'), value.encode('utf-8')
+        extras.append((len(pool), len(key_bytes), len(pool) + len(key_bytes), len(value_bytes)))
+        pool += key_bytes + value_bytes
+
+    flags = FLAG_WORD_RULES if word_rules else 0
+    data = bytearray(_HEADER.pack(
+        TABLE_MAGIC, TABLE_VERSION, flags, ETHIOPIC_BASE, ETHIOPIC_SIZE, len(extras), source_digest(mapping, word_rules)
+    ))
+    data += struct.pack('<%dI' % len(offsets), *offsets)
+    for extra in extras:
+        data += _EXTRA.pack(*extra)
+    data += pool
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write to a temporary file and rename so readers never map a half-written table
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as target:
+        target.write(data)
+    os.replace(temporary, path)
+
+def scheme_table_path(name):
+    return os.path.join(SCHEME_TABLE_DIR, f'{name}.amtr')
+
+def load_scheme_table(path):
+    """Read a compiled table through ``mmap``.
+
+    Returns ``(entries, word_rules)`` where ``entries`` maps each source string
+    that doesn't pass through unchanged to its output.
+    """
+    with open(path, 'rb') as source:
+        table = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, flags, base, count, extra_count, _ = _HEADER.unpack_from(table, 0)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        raise ValueError(f"{path} is not a version {TABLE_VERSION} transliteration table")
+
+    offsets_start = _HEADER.size
+    extras_start = offsets_start + (count + 1) * 4
+    pool_start = extras_start + extra_count * _EXTRA.size
+    offsets = struct.unpack_from('<%dI' % (count + 1), table, offsets_start)
+
+    entries = {}
+    for index in range(count):
+        char = chr(base + index)
+        output = table[pool_start + offsets[index]:pool_start + offsets[index + 1]].decode('utf-8')
+        if output != char:
+            entries[char] = output
+    for key_offset, key_length, value_offset, value_length in _EXTRA.iter_unpack(
+        table[extras_start:pool_start]
+    ):
+        key = table[pool_start + key_offset:pool_start + key_offset + key_length].decode('utf-8')
+        entries[key] = table[pool_start + value_offset:pool_start + value_offset + value_length].decode('utf-8')
+    return entries, bool(flags & FLAG_WORD_RULES)
+
+def table_source_digest(path):
+    """The source digest stored in a compiled table, or None if it is missing or in another format."""
+    try:
+        with open(path, 'rb') as source:
+            header = source.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < _HEADER.size:
+        return None
+    magic, version, *_, digest = _HEADER.unpack(header)
+    return digest if magic == TABLE_MAGIC and version == TABLE_VERSION else None
+
+def refresh_scheme_table(name):
+    """Recompile a scheme's table if it is missing or its source changed; returns whether it did."""
+    build_mapping, word_rules = SCHEME_SOURCES[name]
+    mapping = build_mapping()
+    path = scheme_table_path(name)
+    if table_source_digest(path) == source_digest(mapping, word_rules):
+        return False
+    compile_scheme_table(mapping, path, word_rules=word_rules)
+    return True
+
+def open_scheme_table(name):
+    """Load a named scheme's compiled table, compiling it only if there is none in this format.
+
+    An existing table is not checked against its source; see ``refresh_scheme_table``.
+    """
+    path = scheme_table_path(name)
+    if table_source_digest(path) is None:
+        if name not in SCHEME_SOURCES:
+            raise KeyError(f"Unknown transliteration scheme {name!r}")
+        refresh_scheme_table(name)
+    return load_scheme_table(path)
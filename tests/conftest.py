@@ -0,0 +1,6 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules live at the repo root; the fake Bot API lives with the benchmarks
+sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, 'benchmarks')]
@@ -0,0 +1,120 @@
+"""Every transliteration path must match ``transliterate_amharic`` on the whole text.
+
+Streaming, the word cache and the columnar batch API each take shortcuts
+around the plain pipeline; these checks pin them to its output, including the
+inputs that used to differ.
+"""
+import random
+import re
+
+import pytest
+
+from transliterator_core import (
+    WORD_PREFIX_PATTERN,
+    _transliterate_text,
+    clear_word_caches,
+    get_scheme,
+    map_source_text,
+    transliterate_amharic,
+    transliterate_stream,
+)
+
+WORDS = [
+    "ሰላም", "ለሰላም", "የሰላም", "በዓል", "አማርኛ", "እንዴት", "ኢትዮጵያ", "መጽሐፍ", "ጓደኛ", "ይመስገን", "ሰው።", "ምን፧",
+    "apple", "test", "https://example.com/le?x=1", "e", "le", "123", "`code`", "ABC", "ለ1", "😀ለ", "ለi",
+]
+SEPARATORS = [" ", " ", "", " \t", "\n", "\r\n", "\r", "፠"]
+
+# Inputs that once differed between paths: ፠ starting a word inside a flushed
+# huge word, Latin glued to Ethiopic, and \r\n split across chunks
+REGRESSION_CASES = [
+    "ሰሰሰሰ፠ሰላም", "abcabc፠ለበ", "ሰላም፠abc ለምን", "apple ሰላም።\r\ntest", "ለ\r", "\r\nለ", "ሰላም\r\n\r\nለ",
+]
+HUGE_WORDS = ["ለ" * 50000, "እ" * 3000 + "ለበ" * 3000, "a" * 40000 + "ለ", "ለ" + "እ" * 5000 + "በ", " " * 50000 + "ለበ"]
+
+def mixed_texts(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(rng.randint(1, 12)))
+        for _ in range(count)
+    ] + REGRESSION_CASES
+
+def segment_reference(text):
+    """The default scheme written out plainly: word rules see only the Ethiopic start of each word."""
+    output = []
+    for token in re.split(r'(\s+)', text):
+        match = re.match('[ሀ-፿]+', token)
+        if match and not token.isspace():
+            output.append(WORD_PREFIX_PATTERN.sub(r"\1'", map_source_text(match.group())))
+            token = token[match.end():]
+        output.append(map_source_text(token))
+    return ''.join(output)
+
+def random_chunks(text, max_size, rng):
+    chunks = []
+    while text:
+        size = rng.randint(1, max_size)
+        chunks.append(text[:size])
+        text = text[size:]
+    return chunks
+
+def test_word_rules_only_see_ethiopic_segments():
+    assert transliterate_amharic("apple ሰላም") == "apple s'elam"
+    assert transliterate_amharic("https://example.com/le?x=1 ለ") == "https://example.com/le?x=1 le"
+    for text in mixed_texts(500):
+        if "፠" not in text:
+            assert transliterate_amharic(text) == segment_reference(text), text
+
+@pytest.mark.parametrize('scheme', [None, 'sera'])
+def test_word_cache_matches_uncached(scheme):
+    compiled = get_scheme(scheme)
+    for text in mixed_texts(500):
+        clear_word_caches()
+        cold = transliterate_amharic(text, scheme)
+        assert transliterate_amharic(text, scheme) == cold, text
+        assert _transliterate_text(text, compiled) == cold, text
+
+@pytest.mark.parametrize('scheme', [None, 'sera'])
+def test_stream_matches_whole_text(scheme):
+    rng = random.Random(11)
+    for text in mixed_texts(300):
+        expected = transliterate_amharic(text, scheme)
+        for chunk_size in (1, 2, 3, 7, 4096):
+            chunks = [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+            assert ''.join(transliterate_stream(chunks, chunk_size=chunk_size, scheme=scheme)) == expected, \
+                (text, chunk_size)
+        chunks = random_chunks(text, 9, rng)
+        assert ''.join(transliterate_stream(chunks, chunk_size=9, scheme=scheme)) == expected, (text, chunks)
+
+def test_stream_flushes_huge_words_consistently():
+    for word in HUGE_WORDS + ["ሰ" * 300 + "፠ሰላም"]:
+        chunks = [word[start:start + 100] for start in range(0, len(word), 100)]
+        assert ''.join(transliterate_stream(chunks, chunk_size=100)) == transliterate_amharic(word), word[:20]
+
+@pytest.mark.parametrize('scheme', [None, 'sera'])
+def test_columnar_matches_per_string(scheme):
+    np = pytest.importorskip('numpy')
+    from columnar import transliterate_column
+
+    texts = mixed_texts(400) + ["", "ለ", "a\r", "\nb", "ለበ\x1e"]
+    expected = [transliterate_amharic(text, scheme) for text in texts]
+    assert transliterate_column(np.array(texts), scheme).tolist() == expected
+
+    grid = transliterate_column(np.array(texts[:40]).reshape(8, 5), scheme)
+    assert grid.shape == (8, 5) and grid.reshape(-1).tolist() == expected[:40]
+
+    objects = transliterate_column(np.array(texts[:30] + [None], dtype=object), scheme)
+    assert objects.dtype == object and objects.tolist() == expected[:30] + [None]
+
+@pytest.mark.parametrize('scheme', [None, 'sera'])
+def test_columnar_arrow_matches_per_string(scheme):
+    pa = pytest.importorskip('pyarrow')
+    from columnar import transliterate_column
+
+    texts = mixed_texts(400)
+    expected = [transliterate_amharic(text, scheme) for text in texts]
+    assert transliterate_column(pa.array(texts + [None]), scheme).to_pylist() == expected + [None]
+    sliced = pa.array(texts, type=pa.large_string()).slice(3, 50)
+    assert transliterate_column(sliced, scheme).to_pylist() == expected[3:53]
+    chunked = pa.chunked_array([texts[:10], texts[10:20]])
+    assert transliterate_column(chunked, scheme).to_pylist() == expected[:20]
@@ -0,0 +1,100 @@
+"""Webhook mode end to end: the real bot process, a fake Bot API and a local HTTP client."""
+import asyncio
+import os
+import signal
+import socket
+import sys
+import time
+
+import httpx
+
+from fake_bot_api import FakeBotAPI
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = '123456:webhook'
+SECRET_TOKEN = 'webhook-test-secret'
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def message_update(update_id, chat_id, text):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Webhook'},
+            'text': text,
+        },
+    }
+
+async def wait_for(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        await asyncio.sleep(0.05)
+
+async def post_until_listening(client, url, timeout, **kwargs):
+    """POST to the bot's webhook server, retrying until it accepts connections."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await client.post(url, **kwargs)
+        except httpx.ConnectError:
+            assert time.monotonic() < deadline, 'webhook server did not start'
+            await asyncio.sleep(0.1)
+
+async def run_webhook_check():
+    calls = []
+    api = FakeBotAPI(TOKEN, on_call=lambda method, params, received_at: calls.append((method, params)))
+    api_port = await api.start()
+    webhook_port = free_port()
+    env = dict(
+        os.environ, BOT_TOKEN=TOKEN, BOT_MODE='webhook', BOT_API_BASE_URL=f'http://127.0.0.1:{api_port}/bot',
+        WEBHOOK_URL='https://bot.example.invalid/telegram', WEBHOOK_LISTEN='127.0.0.1',
+        WEBHOOK_PORT=str(webhook_port), WEBHOOK_PATH='telegram', WEBHOOK_SECRET_TOKEN=SECRET_TOKEN,
+    )
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(REPO_ROOT, 'mt_transliterator.py'), 'bot',
+        env=env, cwd=REPO_ROOT, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        await wait_for(lambda: any(method == 'setWebhook' for method, _ in calls), 30)
+        set_webhook = next(params for method, params in calls if method == 'setWebhook')
+        assert set_webhook['url'] == env['WEBHOOK_URL']
+        assert set_webhook['secret_token'] == SECRET_TOKEN
+
+        url = f'http://127.0.0.1:{webhook_port}/telegram'
+        async with httpx.AsyncClient() as client:
+            # Requests without the secret, or with the wrong one, are rejected unprocessed
+            missing = await post_until_listening(client, url, 30, json=message_update(1, 1001, 'ሰላም'))
+            assert missing.status_code == 403
+            wrong = await client.post(url, json=message_update(2, 1002, 'ሰላም'), headers={SECRET_HEADER: 'wrong'})
+            assert wrong.status_code == 403
+
+            accepted = await client.post(
+                url, json=message_update(3, 1003, 'ሰላም'), headers={SECRET_HEADER: SECRET_TOKEN}
+            )
+            assert accepted.status_code == 200
+
+        replies = lambda: [params for method, params in calls if method == 'sendMessage']
+        await wait_for(replies, 30)
+        await asyncio.sleep(0.5)  # Nothing else should arrive
+        assert [int(reply['chat_id']) for reply in replies()] == [1003]
+        assert replies()[0]['text'] == "s'elam"
+    finally:
+        if bot.returncode is None:
+            bot.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(bot.wait(), 15)
+            except asyncio.TimeoutError:
+                bot.kill()
+                await bot.wait()
+        await api.close()
+
+def test_webhook_requires_secret_token():
+    asyncio.run(run_webhook_check())
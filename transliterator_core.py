@@ -0,0 +1,828 @@
+"""Dependency-free Amharic transliteration engine.
+
+Everything here uses only the standard library, so scripts and batch workers
+can import it without pulling in python-telegram-bot. The bot lives in
+``mt_transliterator`` and imports this module.
+"""
+import hashlib
+import io
+import os
+import re
+import sys
+from functools import cached_property, partial
+
+from schemes import SCHEME_SOURCES, open_scheme_table
+from word_cache import WordCache, load_word_caches, save_word_caches
+
+
+# Improved transliteration map with better accuracy
+AMHARIC_MAP = {
+    # ሀ Series
+    "ሀ": "ha", "ሁ": "hu", "ሂ": "hi", "ሃ": "ha", "ሄ": "he", "ህ": "h", "ሆ": "ho", "ሇ": "hwa",
+    
+    # ለ Series  
+    "ለ": "le", "ሉ": "lu", "ሊ": "li", "ላ": "la", "ሌ": "le", "ል": "l", "ሎ": "lo", "ሏ": "lwa",
+    
+    # ሐ Series (hammeru ha)
+    "ሐ": "ha", "ሑ": "hu", "ሒ": "hi", "ሓ": "ha", "ሔ": "he", "ሕ": "h", "ሖ": "ho", "ሗ": "hwa",
+    
+    # መ Series
+    "መ": "me", "ሙ": "mu", "ሚ": "mi", "ማ": "ma", "ሜ": "me", "ም": "m", "ሞ": "mo", "ሟ": "mwa",
+    
+    # ሠ Series
+    "ሠ": "se", "ሡ": "su", "ሢ": "si", "ሣ": "sa", "ሤ": "se", "ሥ": "s", "ሦ": "so", "ሧ": "swa",
+    
+    # ረ Series
+    "ረ": "re", "ሩ": "ru", "ሪ": "ri", "ራ": "ra", "ሬ": "re", "ር": "r", "ሮ": "ro", "ሯ": "rwa",
+    
+    # ሰ Series
+    "ሰ": "se", "ሱ": "su", "ሲ": "si", "ሳ": "sa", "ሴ": "se", "ስ": "s", "ሶ": "so", "ሷ": "swa",
+    
+    # ሸ Series
+    "ሸ": "she", "ሹ": "shu", "ሺ": "shi", "ሻ": "sha", "ሼ": "she", "ሽ": "sh", "ሾ": "sho", "ሿ": "shwa",
+    
+    # ቀ Series
+    "ቀ": "qe", "ቁ": "qu", "ቂ": "qi", "ቃ": "qa", "ቄ": "qe", "ቅ": "q", "ቆ": "qo", "ቇ": "qwa",
+    
+    # በ Series
+    "በ": "be", "ቡ": "bu", "ቢ": "bi", "ባ": "ba", "ቤ": "be", "ብ": "b", "ቦ": "bo", "ቧ": "bwa",
+    
+    # ቨ Series
+    "ቨ": "ve", "ቩ": "vu", "ቪ": "vi", "ቫ": "va", "ቬ": "ve", "ቭ": "v", "ቮ": "vo", "ቯ": "vwa",
+    
+    # ተ Series
+    "ተ": "te", "ቱ": "tu", "ቲ": "ti", "ታ": "ta", "ቴ": "te", "ት": "t", "ቶ": "to", "ቷ": "twa",
+    
+    # ቸ Series
+    "ቸ": "che", "ቹ": "chu", "ቺ": "chi", "ቻ": "cha", "ቼ": "che", "ች": "ch", "ቾ": "cho", "ቿ": "chwa",
+    
+    # ኀ Series (same as ሀ)
+    "ኀ": "ha", "ኁ": "hu", "ኂ": "hi", "ኃ": "ha", "ኄ": "he", "ኅ": "h", "ኆ": "ho", "ኇ": "hwa",
+    
+    # ነ Series
+    "ነ": "ne", "ኑ": "nu", "ኒ": "ni", "ና": "na", "ኔ": "ne", "ን": "n", "ኖ": "no", "ኗ": "nwa",
+    
+    # ኘ Series
+    "ኘ": "gne", "ኙ": "gnu", "ኚ": "gni", "ኛ": "gna", "ኜ": "gne", "ኝ": "gn", "ኞ": "gno", "ኟ": "gnwa",
+    
+    # Vowels (independent)
+    "አ": "a", "ኡ": "u", "ኢ": "i", "ኣ": "a", "ኤ": "e", "እ": "", "ኦ": "o", "ኧ": "wa",
+    
+    # ከ Series
+    "ከ": "ke", "ኩ": "ku", "ኪ": "ki", "ካ": "ka", "ኬ": "ke", "ክ": "k", "ኮ": "ko", "ኯ": "kwa",
+    
+    # ኸ Series
+    "ኸ": "khe", "ኹ": "khu", "ኺ": "khi", "ኻ": "kha", "ኼ": "khe", "ኽ": "kh", "ኾ": "kho", "ዀ": "khwa",
+    
+    # ወ Series
+    "ወ": "we", "ዉ": "wu", "ዊ": "wi", "ዋ": "wa", "ዌ": "we", "ው": "w", "ዎ": "wo", "ዏ": "wwa",
+    
+    # ዐ Series (glottal)
+    "ዐ": "a", "ዑ": "u", "ዒ": "i", "ዓ": "a", "ዔ": "e", "ዕ": "", "ዖ": "o", "዗": "wa",
+    
+    # ዘ Series
+    "ዘ": "ze", "ዙ": "zu", "ዚ": "zi", "ዛ": "za", "ዜ": "ze", "ዝ": "z", "ዞ": "zo", "ዟ": "zwa",
+    
+    # ዠ Series
+    "ዠ": "zhe", "ዡ": "zhu", "ዢ": "zhi", "ዣ": "zha", "ዤ": "zhe", "ዥ": "zh", "ዦ": "zho", "ዧ": "zhwa",
+    
+    # የ Series
+    "የ": "ye", "ዩ": "yu", "ዪ": "yi", "ያ": "ya", "ዬ": "ye", "ይ": "y", "ዮ": "yo", "ዯ": "ywa",
+    
+    # ደ Series
+    "ደ": "de", "ዱ": "du", "ዲ": "di", "ዳ": "da", "ዴ": "de", "ድ": "d", "ዶ": "do", "ዷ": "dwa",
+    
+    # ጀ Series
+    "ጀ": "je", "ጁ": "ju", "ጂ": "ji", "ጃ": "ja", "ጄ": "je", "ጅ": "j", "ጆ": "jo", "ጇ": "jwa",
+    
+    # ገ Series
+    "ገ": "ge", "ጉ": "gu", "ጊ": "gi", "ጋ": "ga", "ጌ": "ge", "ግ": "g", "ጎ": "go", "ጏ": "gwa",
+    
+    # ጠ Series
+    "ጠ": "te", "ጡ": "tu", "ጢ": "ti", "ጣ": "ta", "ጤ": "te", "ጥ": "t", "ጦ": "to", "ጧ": "twa",
+    
+    # ጨ Series
+    "ጨ": "che", "ጩ": "chu", "ጪ": "chi", "ጫ": "cha", "ጬ": "che", "ጭ": "ch", "ጮ": "cho", "ጯ": "chwa",
+    
+    # ጰ Series
+    "ጰ": "pe", "ጱ": "pu", "ጲ": "pi", "ጳ": "pa", "ጴ": "pe", "ጵ": "p", "ጶ": "po", "ጷ": "pwa",
+    
+    # ጸ Series
+    "ጸ": "tse", "ጹ": "tsu", "ጺ": "tsi", "ጻ": "tsa", "ጼ": "tse", "ጽ": "ts", "ጾ": "tso", "ጿ": "tswa",
+    
+    # ፀ Series  
+    "ፀ": "tse", "ፁ": "tsu", "ፂ": "tsi", "ፃ": "tsa", "ፄ": "tse", "ፅ": "ts", "ፆ": "tso", "ፇ": "tswa",
+    
+    # ፈ Series
+    "ፈ": "fe", "ፉ": "fu", "ፊ": "fi", "ፋ": "fa", "ፌ": "fe", "ፍ": "f", "ፎ": "fo", "ፏ": "fwa",
+    
+    # ፐ Series
+    "ፐ": "pe", "ፑ": "pu", "ፒ": "pi", "ፓ": "pa", "ፔ": "pe", "ፕ": "p", "ፖ": "po", "ፗ": "pwa",
+    
+    # Punctuation and special characters
+    "።": ".", "፣": ",", "፤": ";", "፥": ":", "፦": "::", "፧": "?", "፨": "!", "፠": " ",
+    " ": " ", "\n": "\n", "\r": "\n", "\r\n": "\n", "\t": " ",
+    # Rare jawns
+    "ኵ":"kwi", "ኧ": "e","ቋ": "qwa", "ቓ": "qwa", "ጓ": "gwa", "ጕ": "gwi", "ኋ": "hwa", "ዃ": "hwa", "ቒ": "qwi", "ኊ": "khwi", "ጚ": "jji",
+
+    # Numbers
+    "፩": "1", "፪": "2", "፫": "3", "፬": "4", "፭": "5", "፮": "6", "፯": "7", "፰": "8", "፱": "9", "፲": "10",
+}
+
+# Enhanced consonant cluster rules
+CONSONANT_CLUSTERS = {
+    # Common patterns
+    'mgb': 'migib',     # ምግብ
+    'lj': 'lij',        # ልጅ  
+    'nkb': 'nikib',     # እንክብ
+    'str': 'sitir',     # ስትር
+    'bst': 'bist',      # በስት
+    'shr': 'shir',      # ሽር
+}
+
+# Prefixes that should get apostrophes
+PREFIXES_WITH_APOSTROPHE = ['le', 'ye', 'be', 'ke', 'ma', 'me', 'e', 'a', 'te', 's', 'en', 'ya', 'y']
+
+# Prefix rules compiled once into an alternation, longest prefix first to avoid
+# partial matches. A prefix only counts if something follows it, and an 'i' right
+# after the apostrophe is dropped (le + ilam -> le'lam).
+_PREFIX_ALTERNATION = '|'.join(
+    re.escape(prefix) for prefix in sorted(PREFIXES_WITH_APOSTROPHE, key=len, reverse=True)
+)
+PREFIX_APOSTROPHE_PATTERN = re.compile(r'\A(%s)(?=.)i?' % _PREFIX_ALTERNATION, re.DOTALL)
+# Same rule applied at the start of every word (a non-whitespace run) in a text
+WORD_PREFIX_PATTERN = re.compile(r'(?<!\S)(%s)(?=\S)i?' % _PREFIX_ALTERNATION)
+
+# Default number of characters read per chunk when streaming
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Word rules only look at the prefix plus the character right after it, so once a
+# word is longer than this its post-processed start can never change again
+WORD_RULE_WINDOW = max(len(prefix) for prefix in PREFIXES_WITH_APOSTROPHE) + 2
+
+class LongestMatchRules:
+    """Single-pass, longest-match rewriting for a set of literal multi-codepoint rules.
+
+    The rules are compiled into a regex shaped like a trie (``l(?:j|nk)`` rather
+    than ``lj|lnk``), so the C regex engine walks one trie path per position and
+    skips positions whose character can't start any rule. Cost stays flat as
+    rules are added, and the result no longer depends on rule order: at each
+    position the longest matching rule wins, leftmost first.
+    """
+
+    def __init__(self, rules):
+        self.rules = dict(rules)
+        if '' in self.rules:
+            raise ValueError("Rewrite rules can't have an empty key")
+        self.max_length = max(map(len, self.rules), default=0)
+        # Proper prefixes of rules: text ending in one of these may still grow into a match
+        self.partial_keys = {key[:end] for key in self.rules for end in range(1, len(key))}
+        self.pattern = re.compile(self._trie_regex(self.rules), re.DOTALL) if self.rules else None
+
+    @staticmethod
+    def _trie_regex(keys):
+        trie = {}
+        for key in keys:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[None] = True  # A rule ends here
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items(), key=str) if char is not None]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:%s)' % '|'.join(branches)
+            # Greedy optional tail: try the longer rule first, fall back to the one ending here
+            return '(?:%s)?' % body if None in node else body
+
+        return build(trie)
+
+    def rewrite(self, text, translate_table=None):
+        """Rewrite every rule match in one pass.
+
+        Text between matches is copied as is, or mapped through
+        ``translate_table`` when one is given, so rule outputs are never mapped
+        a second time.
+        """
+        if self.pattern is None:
+            return text.translate(translate_table) if translate_table is not None else text
+        if translate_table is None:
+            return self.pattern.sub(lambda match: self.rules[match.group()], text)
+
+        pieces = []
+        last = 0
+        for match in self.pattern.finditer(text):
+            pieces.append(text[last:match.start()].translate(translate_table))
+            pieces.append(self.rules[match.group()])
+            last = match.end()
+        pieces.append(text[last:].translate(translate_table))
+        return ''.join(pieces)
+
+    def final_length(self, text):
+        """Length of the longest prefix of ``text`` whose rewriting can't change if more text follows.
+
+        Used to cut streamed or incrementally typed text without splitting a
+        rule that could still match across the cut.
+        """
+        if self.pattern is None:
+            return len(text)
+
+        tail_start = max(0, len(text) - self.max_length + 1)
+        # Matches starting before tail_start are final; one of them may run into the tail
+        position = tail_start
+        for match in self.pattern.finditer(text):
+            if match.end() > tail_start:
+                if match.start() < tail_start:
+                    position = match.end()
+                break
+
+        # Walk the positions the matcher would try from there on
+        while position < len(text):
+            if text[position:] in self.partial_keys:
+                return position
+            match = self.pattern.match(text, position)
+            position = match.end() if match else position + 1
+        return len(text)
+
+# Ethiopic script Unicode range (U+1200–U+137F)
+ETHIOPIC_PATTERN = re.compile('[\u1200-\u137F]')
+ETHIOPIC_RUN_PATTERN = re.compile('[\u1200-\u137F]+')
+# Ethiopic words and the whitespace between them. Word rules only ever see
+# these segments; the text around them (Latin words, URLs, code, digits) is
+# copied through.
+ETHIOPIC_SEGMENT_PATTERN = re.compile('[\u1200-\u137F]+(?:\\s+[\u1200-\u137F]+)*')
+
+# Entries in each scheme's word-level LRU cache (0 disables caching)
+WORD_CACHE_SIZE = int(os.getenv('WORD_CACHE_SIZE', 50_000))
+# Longer words are transliterated but not cached, so one odd paste can't flush the cache
+WORD_CACHE_MAX_WORD = 64
+# Part of every scheme fingerprint. Bump it whenever the pipeline's output changes
+# for the same tables (e.g. where word rules apply), so persisted caches are dropped.
+# 2: word rules only see Ethiopic segments
+PIPELINE_VERSION = 2
+
+class Scheme:
+    """A romanization scheme compiled for the hot path.
+
+    Single-codepoint entries become a str.translate table (runs in C).
+    Multi-codepoint source sequences (e.g. "\r\n") become longest-match rules
+    that take precedence over the table. ``word_rules`` says whether the
+    prefix apostrophe rules, written for the default scheme, apply; they only
+    ever see Ethiopic words, so Latin text, URLs and code pass through intact.
+
+    Output is cached per space-separated source word in ``word_cache``. Words
+    are independent as long as a space maps to itself and no multi-codepoint
+    sequence contains one; schemes that break this get no cache.
+    """
+
+    def __init__(self, name, mapping, word_rules=True):
+        self.name = name
+        self.translate_table = str.maketrans({char: latin for char, latin in mapping.items() if len(char) == 1})
+        self.sequence_rules = LongestMatchRules(
+            {sequence: latin for sequence, latin in mapping.items() if len(sequence) > 1}
+        )
+        self.word_rules = word_rules
+        if word_rules and not all(
+            sequence.isspace() or ETHIOPIC_RUN_PATTERN.fullmatch(sequence) for sequence in self.sequence_rules.rules
+        ):
+            raise ValueError(f"Scheme {name!r}: word rules need sequences that are all whitespace or all Ethiopic")
+        # Text between Ethiopic segments is copied unless it holds a character the scheme rewrites
+        rewritten = sorted({
+            source[0] for source, latin in mapping.items() if source != latin and not ETHIOPIC_PATTERN.match(source)
+        })
+        self.outside_pattern = re.compile('[%s]' % re.escape(''.join(rewritten))) if rewritten else None
+        # Non-whitespace characters whose output ends in whitespace (e.g. ፠): a word starts after them
+        self.word_break_chars = ''.join(sorted(
+            char for char, latin in mapping.items()
+            if len(char) == 1 and not char.isspace() and latin and latin[-1].isspace()
+        ))
+
+        words_independent = mapping.get(' ', ' ') == ' ' and not any(
+            ' ' in sequence for sequence in self.sequence_rules.rules
+        )
+        self.word_cache = WordCache(WORD_CACHE_SIZE) if WORD_CACHE_SIZE > 0 and words_independent else None
+
+    @cached_property
+    def fingerprint(self):
+        """Digest of everything that affects this scheme's output; persisted cache entries must match it."""
+        rules = (
+            PIPELINE_VERSION, sorted(self.translate_table.items()), sorted(self.sequence_rules.rules.items()),
+            self.word_rules and WORD_PREFIX_PATTERN.pattern,
+        )
+        return hashlib.blake2b(repr(rules).encode('utf-8'), digest_size=16).hexdigest()
+
+    def map_source_text(self, text):
+        """Map source characters to Latin: multi-codepoint sequences first, then the per-character table."""
+        return self.sequence_rules.rewrite(text, self.translate_table)
+
+    def map_outside_text(self, text):
+        """Map text with no Ethiopic in it, which usually passes through unchanged."""
+        if self.outside_pattern is None or self.outside_pattern.search(text) is None:
+            return text
+        return self.map_source_text(text)
+
+DEFAULT_SCHEME_NAME = 'default'
+DEFAULT_SCHEME = Scheme(DEFAULT_SCHEME_NAME, AMHARIC_MAP)
+AMHARIC_TRANSLATION_TABLE = DEFAULT_SCHEME.translate_table
+SOURCE_SEQUENCE_RULES = DEFAULT_SCHEME.sequence_rules
+
+# Schemes loaded in this process, by name. Other schemes are read from their
+# compiled tables on first use, then cost one dict lookup per call.
+_loaded_schemes = {DEFAULT_SCHEME_NAME: DEFAULT_SCHEME}
+
+def available_schemes():
+    """Names of every scheme that can be passed as ``scheme=``."""
+    return [DEFAULT_SCHEME_NAME] + sorted(SCHEME_SOURCES)
+
+def get_scheme(name=None):
+    """Return a compiled Scheme by name (None means the default scheme)."""
+    if name is None:
+        return DEFAULT_SCHEME
+    scheme = _loaded_schemes.get(name)
+    if scheme is None:
+        entries, word_rules = open_scheme_table(name)
+        scheme = _loaded_schemes[name] = Scheme(name, entries, word_rules)
+    return scheme
+
+# Output-side consonant cluster rules, applied in one longest-match pass
+CONSONANT_CLUSTER_RULES = LongestMatchRules(CONSONANT_CLUSTERS)
+
+# Typed between Latin letters to split syllables in reverse mode ("n'a" -> ንአ, "na" -> ና)
+REVERSE_SYLLABLE_SEPARATOR = "'"
+
+# Series romanized exactly like a more common series; reverse mode only picks them
+# when nothing else produces the same Latin (ሐ/ኀ like ሀ, ሠ like ሰ, ዐ like አ,
+# ፀ like ጸ, ejective ጰ like ፐ)
+REVERSE_DISPREFERRED_SERIES = "ሐኀሠዐፀጰ"
+
+def reverse_rules(mapping=AMHARIC_MAP):
+    """Derive Latin -> Ge'ez rules from a forward (Ge'ez -> Latin) mapping.
+
+    Only Ethiopic letters are reversed; punctuation, numerals and whitespace
+    pass through as typed. The forward map is many-to-one, so each Latin
+    string goes to the syllable with the lowest vowel order, then outside
+    ``REVERSE_DISPREFERRED_SERIES``, then with the lowest codepoint:
+    "ha" -> ሀ (not ሃ, ሐ or ኀ), "se" -> ሰ (not ሠ), "gwa" -> ጓ (not ጏ).
+    """
+    best = {}
+    for source, latin in mapping.items():
+        if not latin or len(source) != 1 or not source.isalpha() or not ETHIOPIC_PATTERN.match(source):
+            continue
+        # Syllables come in rows of eight, one per vowel order
+        order = (ord(source) - 0x1200) % 8
+        rank = (order, chr(ord(source) - order) in REVERSE_DISPREFERRED_SERIES, ord(source))
+        if latin not in best or rank < best[latin][0]:
+            best[latin] = (rank, source)
+    rules = {latin: source for latin, (rank, source) in best.items()}
+    rules[REVERSE_SYLLABLE_SEPARATOR] = ""
+    return rules
+
+# Latin -> Ge'ez, decoded by greedy longest match over a trie of the rules
+REVERSE_RULES = LongestMatchRules(reverse_rules())
+
+# The forward word rules put an apostrophe after a leading prefix. After a prefix
+# ending in a consonant it splits a syllable ("ሰላም" -> "s'elam"), so reverse mode
+# drops it there to rejoin the syllable; any other apostrophe separates syllables
+REVERSE_PREFIX_PATTERN = re.compile(r"(?<!\S)(%s)'(?=[aeiou])" % '|'.join(
+    re.escape(prefix) for prefix in PREFIXES_WITH_APOSTROPHE if prefix[-1] not in 'aeiou'
+))
+
+def has_amharic_content(text):
+    """Check if text contains Amharic characters."""
+    if not text:
+        return False
+    return ETHIOPIC_PATTERN.search(text) is not None
+
+def map_source_text(text, scheme=None):
+    """Map source characters to Latin: multi-codepoint sequences first, then the per-character table."""
+    return get_scheme(scheme).map_source_text(text)
+
+def transliterate_with_detection(amharic_text, scheme=None):
+    """Transliterate text and report whether it contained Amharic, in one call.
+
+    Returns a ``(transliterated, has_amharic)`` tuple so handlers don't have to
+    scan the input a second time. ``scheme`` names the romanization scheme
+    (see ``available_schemes()``); the default scheme is used when omitted.
+    """
+    if not amharic_text:
+        return "", False
+
+    scheme = get_scheme(scheme)
+    has_amharic = ETHIOPIC_PATTERN.search(amharic_text) is not None
+    if scheme.word_cache is not None:
+        return _transliterate_cached_words(amharic_text, scheme), has_amharic
+    return _transliterate_text(amharic_text, scheme), has_amharic
+
+def _transliterate_text(text, scheme):
+    if not scheme.word_rules:
+        # Map every character through the precompiled tables (runs in C, no per-char Python loop)
+        return scheme.map_source_text(text)
+    return _transliterate_segments(text, scheme, False)
+
+# Joins a text's Ethiopic segments for one mapping and rule pass. The record
+# separator is whitespace to the word rules, so no rule reaches across it; a
+# segment glued to the text before it also gets a NUL, so it doesn't start a word.
+_SEGMENT_SEPARATOR = '\x1e'
+_CONTINUING_MARK = '\x00'
+
+def _transliterate_segments(text, scheme, continuing_word):
+    """Transliterate Ethiopic segments and copy the text between them.
+
+    ``continuing_word`` says the text starts inside a word whose start was
+    already processed (a streamed piece), so no word rule applies there.
+    """
+    between = []
+    segments = []
+    position = 0
+    for match in ETHIOPIC_SEGMENT_PATTERN.finditer(text):
+        start = match.start()
+        between.append(text[position:start])
+        # A segment glued to preceding text (e.g. "ABCለ") starts mid-word
+        if not text[start - 1].isspace() if start else continuing_word:
+            segments.append(_CONTINUING_MARK + match.group())
+        else:
+            segments.append(match.group())
+        position = match.end()
+    if not segments:
+        return scheme.map_outside_text(text)
+    between.append(text[position:])
+
+    mapped = apply_post_processing_rules_preserving_formatting(
+        scheme.map_source_text(_SEGMENT_SEPARATOR.join(segments))
+    ).split(_SEGMENT_SEPARATOR)
+    if len(mapped) != len(segments):
+        # A segment itself contained the separator
+        mapped = [
+            _post_process_piece(scheme.map_source_text(segment[1:]), True) if segment[0] == _CONTINUING_MARK
+            else _post_process_piece(scheme.map_source_text(segment), False)
+            for segment in segments
+        ]
+    else:
+        mapped = [value[1:] if segment[0] == _CONTINUING_MARK else value for segment, value in zip(segments, mapped)]
+
+    if scheme.outside_pattern is not None and scheme.outside_pattern.search(text) is not None:
+        between = [scheme.map_outside_text(run) for run in between]
+    pieces = [between[0]]
+    for value, run in zip(mapped, between[1:]):
+        pieces.append(value)
+        pieces.append(run)
+    return ''.join(pieces)
+
+def _transliterate_cached_words(text, scheme):
+    """Transliterate space-separated words through the scheme's LRU cache; same output as _transliterate_text."""
+    cache = scheme.word_cache
+    entries = cache.entries
+    get, move_to_end = entries.get, entries.move_to_end
+    # str.split(' ') runs in C; a "word" may hold other whitespace, which its own pass handles
+    words = text.split(' ')
+    pieces = []
+    missing = {}
+    with cache.lock:
+        cache.lookups += len(words)
+        for word in words:
+            value = get(word)
+            if value is None:
+                missing[word] = None
+            else:
+                move_to_end(word)
+            pieces.append(value)
+        if not missing:
+            return ' '.join(pieces)
+
+        cache.misses += pieces.count(None)
+        for word, value in zip(missing, _transliterate_words(list(missing), scheme)):
+            missing[word] = value
+            if len(word) <= WORD_CACHE_MAX_WORD:
+                entries[word] = value
+        cache.evict()
+    return ' '.join([missing[word] if value is None else value for word, value in zip(words, pieces)])
+
+# Joins cache misses for one pass. A word's output may contain spaces (፠ maps to
+# one), so the words are split on a noncharacter that no scheme maps or produces;
+# the spaces around it keep every word's start and end context unchanged.
+_MISSED_WORD_SEPARATOR = ' \uffff '
+
+def _transliterate_words(words, scheme):
+    """Transliterate cache misses together in one pass, then split the result back into words."""
+    values = _transliterate_text(_MISSED_WORD_SEPARATOR.join(words), scheme).split(_MISSED_WORD_SEPARATOR)
+    if len(values) != len(words):
+        # The input itself contained the separator
+        values = [_transliterate_text(word, scheme) for word in words]
+    return values
+
+def word_cache_stats():
+    """Hit-rate statistics of every loaded scheme's word cache, by scheme name."""
+    return {
+        name: scheme.word_cache.stats()
+        for name, scheme in _loaded_schemes.items() if scheme.word_cache is not None
+    }
+
+def clear_word_caches():
+    for scheme in _loaded_schemes.values():
+        if scheme.word_cache is not None:
+            scheme.word_cache.clear()
+
+def persist_word_caches(path):
+    """Save every loaded scheme's word cache to the SQLite file at ``path``."""
+    save_word_caches(path, [
+        (name, scheme.fingerprint, scheme.word_cache.snapshot())
+        for name, scheme in _loaded_schemes.items() if scheme.word_cache is not None
+    ])
+
+def warm_word_caches(path):
+    """Fill word caches from a file written by ``persist_word_caches``; returns entries loaded.
+
+    Entries saved for a scheme whose mapping or rules have since changed are skipped.
+    """
+    if not os.path.exists(path):
+        return 0
+    loaded = 0
+    for (name, fingerprint), entries in load_word_caches(path).items():
+        if name not in available_schemes():
+            continue
+        scheme = get_scheme(name)
+        if scheme.word_cache is None or scheme.fingerprint != fingerprint:
+            continue
+        cache = scheme.word_cache
+        with cache.lock:
+            for word, output in entries[-cache.max_size:]:
+                cache.put(word, output)
+        loaded += min(len(entries), cache.max_size)
+    return loaded
+
+def transliterate_amharic(amharic_text, scheme=None):
+    """Transliterate Amharic text while preserving original formatting (spacing, indentation, line breaks)."""
+    return transliterate_with_detection(amharic_text, scheme)[0]
+
+def transliterate_to_geez(latin_text):
+    """Transliterate Latin text to Ge'ez (Fidel) script, the reverse of the default scheme.
+
+    Input is lowercased, then split into syllables by greedy longest match
+    ("selam" -> se·la·m -> ሰላም) in one left-to-right pass, so decoding is
+    linear in the input length. Characters no rule covers are kept as typed.
+    Prefix apostrophes added by the forward direction are undone, so its output
+    reads back: "s'elam" -> ሰላም.
+    """
+    if not latin_text:
+        return ""
+    return REVERSE_RULES.rewrite(REVERSE_PREFIX_PATTERN.sub(r'\1', latin_text.lower()))
+
+def apply_post_processing_rules_preserving_formatting(text):
+    """Post-process text while preserving all original spacing and line breaks."""
+    # Do NOT collapse whitespace. The word rules are a single regex that only
+    # matches at word starts, so the whole text is rewritten in one pass and all
+    # spacing/indentation between words is left exactly as it was.
+    return WORD_PREFIX_PATTERN.sub(r"\1'", text)
+
+
+def apply_post_processing_rules(text):
+    """Apply post-processing rules for better transliteration."""
+    # Remove extra spaces
+    text = ' '.join(text.split())
+    
+    # Apply consonant cluster rules (single pass, longest match wins)
+    text = CONSONANT_CLUSTER_RULES.rewrite(text)
+    
+    # Split text more carefully - handle compound words
+    # Look for word boundaries (spaces, punctuation, numbers)
+    import re
+    words = re.split(r'(\s+|[.,;:!?/\d]+)', text)
+    processed_words = []
+    
+    for word in words:
+        # Skip whitespace and punctuation
+        if not word or word.isspace() or not any(c.isalpha() for c in word):
+            processed_words.append(word)
+            continue
+            
+        # Apply prefix apostrophe rules only to actual words
+        if len(word) > 1:
+            word = apply_prefix_apostrophe_rules(word)
+        processed_words.append(word)
+    
+    return ''.join(processed_words)
+
+def apply_prefix_apostrophe_rules(word):
+    """Apply prefix apostrophe rules to a word."""
+    if not word:
+        return word
+    return PREFIX_APOSTROPHE_PATTERN.sub(r"\1'", word, count=1)
+
+def transliterate_stream(source, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, scheme=None):
+    """Transliterate a text file-like object or an iterable of text chunks lazily.
+
+    Yields transliterated chunks whose concatenation equals
+    ``transliterate_amharic`` of the whole input. Words and whitespace that
+    straddle chunk boundaries are handled, and memory stays bounded by
+    ``chunk_size`` no matter how large the input is.
+    """
+    if hasattr(source, 'read'):
+        source = iter(partial(source.read, chunk_size), '')
+
+    scheme = get_scheme(scheme)
+    if not scheme.word_rules:
+        yield from _map_stream(source, scheme)
+        return
+
+    limit = max(chunk_size, WORD_RULE_WINDOW)
+    # Source text not yet emitted: the last word and any whitespace after it
+    pending = ""
+    # True when the start of the word at the front of `pending` was already emitted
+    continuing_word = False
+
+    for chunk in source:
+        if not chunk:
+            continue
+        pending += chunk
+
+        # Only text up to the last word is final: the word may continue, and so
+        # may trailing whitespace (a "\r" before a "\n")
+        if pending[-1].isspace():
+            cut = len(pending.rstrip())
+        else:
+            cut = len(pending) - len(pending.rsplit(None, 1)[-1])
+        if cut:
+            yield _transliterate_segments(pending[:cut], scheme, continuing_word)
+            pending = pending[cut:]
+            continuing_word = False
+
+        # A single huge word or whitespace run: flush all but a tail a
+        # multi-codepoint sequence could still extend
+        if len(pending) > limit:
+            final = scheme.sequence_rules.final_length(pending)
+            # The output after a character mapped to whitespace starts a new word
+            word_break = max((pending.rfind(char, 0, final) for char in scheme.word_break_chars), default=-1) + 1
+            if word_break:
+                yield _transliterate_segments(pending[:word_break], scheme, continuing_word)
+                pending = pending[word_break:]
+                continuing_word = False
+            elif pending[0].isspace() or continuing_word or _word_start_settled(pending[:final], scheme):
+                yield _transliterate_segments(pending[:final], scheme, continuing_word)
+                continuing_word = not pending[0].isspace()
+                pending = pending[final:]
+
+    if pending:
+        yield _transliterate_segments(pending, scheme, continuing_word)
+
+def _word_start_settled(word, scheme):
+    """Whether more text after ``word`` can no longer change how its start is transliterated."""
+    # Word rules see only the leading Ethiopic run, up to WORD_RULE_WINDOW mapped characters
+    match = ETHIOPIC_RUN_PATTERN.match(word)
+    return match is None or match.end() < len(word) or len(scheme.map_source_text(word)) >= WORD_RULE_WINDOW
+
+def transliterate_file(input_path, output_path, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, scheme=None):
+    """Stream-transliterate a UTF-8 text file into ``output_path``.
+
+    Either path may instead be an open binary file object, such as
+    ``sys.stdin.buffer``. Memory stays bounded by ``chunk_size``. A byte order
+    mark is dropped and undecodable bytes are replaced. Returns True if the
+    input contained Amharic.
+    """
+    has_amharic = False
+
+    def chunks(source):
+        nonlocal has_amharic
+        for chunk in iter(partial(source.read, chunk_size), ''):
+            has_amharic = has_amharic or ETHIOPIC_PATTERN.search(chunk) is not None
+            yield chunk
+
+    with _open_text(input_path, 'r', encoding='utf-8-sig', errors='replace') as source, \
+            _open_text(output_path, 'w', encoding='utf-8') as target:
+        for piece in transliterate_stream(chunks(source), chunk_size=chunk_size, scheme=scheme):
+            target.write(piece)
+    return has_amharic
+
+def _open_text(file, mode, **kwargs):
+    """Open a path, or wrap an open binary file object, as a text file."""
+    # newline='' keeps \r and \r\n intact so output matches transliterate_amharic exactly
+    if isinstance(file, (str, bytes, os.PathLike)):
+        return open(file, mode, newline='', **kwargs)
+    return io.TextIOWrapper(file, newline='', **kwargs)
+
+def _map_stream(chunks, scheme):
+    """Stream a scheme without word rules: only sequences straddling chunks need care."""
+    carry = ""
+    for chunk in chunks:
+        chunk = carry + chunk
+        final = scheme.sequence_rules.final_length(chunk)
+        carry = chunk[final:]
+        if final:
+            yield scheme.map_source_text(chunk[:final])
+    if carry:
+        yield scheme.map_source_text(carry)
+
+def _post_process_piece(text, continuing_word):
+    """Post-process mapped text, passing through the tail of a word whose start was already processed."""
+    if not text:
+        return text
+    if not continuing_word:
+        return apply_post_processing_rules_preserving_formatting(text)
+
+    # The leading non-whitespace run belongs to a word whose start was already processed
+    word_tail = "" if text[0].isspace() else text.split(None, 1)[0]
+    return word_tail + apply_post_processing_rules_preserving_formatting(text[len(word_tail):])
+
+def transliterate_many(texts, workers=None, chunksize=None, scheme=None):
+    """Transliterate many texts across a process pool, preserving input order.
+
+    Texts are sent to workers in batches of ``chunksize`` to amortize pickling.
+    ``workers`` defaults to the number of CPUs; with one worker everything runs
+    in-process. Workers load ``scheme`` from its memory-mapped table, so they
+    all share one copy of it.
+    """
+    texts = list(texts)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(texts) <= 1:
+        return [transliterate_amharic(text, scheme) for text in texts]
+
+    if chunksize is None:
+        # Same heuristic as multiprocessing.Pool.map: about four batches per worker
+        chunksize = max(1, -(-len(texts) // (workers * 4)))
+
+    # Imported lazily: multiprocessing is slow to import and most callers never need it
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(transliterate_amharic, scheme=scheme), texts, chunksize=chunksize))
+
+def transliterate_file_command(args) -> None:
+    """Stream-transliterate a file (or stdin) to a file (or stdout)."""
+    transliterate_file(
+        sys.stdin.buffer if args.input == '-' else args.input,
+        sys.stdout.buffer if args.output == '-' else args.output,
+        chunk_size=args.chunk_size, scheme=args.scheme
+    )
+
+def batch_command(args) -> None:
+    """Transliterate a file with one text per line in parallel, writing one result per line."""
+    with open(args.input, encoding='utf-8', newline='') as source:
+        texts = [line.rstrip('\r\n') for line in source]
+
+    results = transliterate_many(texts, workers=args.workers, chunksize=args.chunksize, scheme=args.scheme)
+
+    if args.output == '-':
+        target = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+    else:
+        target = open(args.output, 'w', encoding='utf-8', newline='')
+    with target:
+        for result in results:
+            target.write(result + '\n')
+
+def compile_schemes_command(args) -> None:
+    """Compile missing or stale scheme tables ahead of time so workers only ever read them."""
+    from schemes import refresh_scheme_table, scheme_table_path
+    for name in args.names or sorted(SCHEME_SOURCES):
+        if name not in SCHEME_SOURCES:
+            raise SystemExit(f"Unknown scheme {name!r}; choose from {', '.join(sorted(SCHEME_SOURCES))}")
+        status = 'compiled' if refresh_scheme_table(name) else 'up to date'
+        print(f"{name}: {scheme_table_path(name)} ({status})")
+
+def add_offline_commands(subparsers) -> None:
+    """Register the offline (no bot token) commands on an argparse subparsers object."""
+    transliterate_parser = subparsers.add_parser(
+        'transliterate', help='Transliterate a file offline (no bot token needed)'
+    )
+    transliterate_parser.add_argument('input', nargs='?', default='-', help="Input file, '-' for stdin (default)")
+    transliterate_parser.add_argument('-o', '--output', default='-', help="Output file, '-' for stdout (default)")
+    transliterate_parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_STREAM_CHUNK_SIZE, help='Characters read per chunk'
+    )
+    transliterate_parser.add_argument(
+        '--scheme', choices=available_schemes(), default=None, help='Romanization scheme (default: default)'
+    )
+    transliterate_parser.set_defaults(handler=transliterate_file_command)
+
+    batch_parser = subparsers.add_parser(
+        'batch', help='Transliterate a file of one text per line in parallel (no bot token needed)'
+    )
+    batch_parser.add_argument('input', help='Input file with one text per line')
+    batch_parser.add_argument('-o', '--output', default='-', help="Output file, '-' for stdout (default)")
+    batch_parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    batch_parser.add_argument('--chunksize', type=int, default=None, help='Texts sent to a worker per batch')
+    batch_parser.add_argument(
+        '--scheme', choices=available_schemes(), default=None, help='Romanization scheme (default: default)'
+    )
+    batch_parser.set_defaults(handler=batch_command)
+
+    compile_parser = subparsers.add_parser('compile-schemes', help='Compile missing or stale scheme tables')
+    compile_parser.add_argument(
+        'names', nargs='*', metavar='NAME', help='Schemes to compile: %s (default: all)' % ', '.join(sorted(SCHEME_SOURCES))
+    )
+    compile_parser.set_defaults(handler=compile_schemes_command)
+
+def cli(argv=None) -> None:
+    """Command-line entry point for the offline commands."""
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='python -m transliterator_core',
+        description='Amharic to Latin transliterator (offline commands only).'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_offline_commands(subparsers)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,113 @@
+"""Bounded word-level LRU cache with optional SQLite persistence.
+
+Chat text reuses a small vocabulary, so the transliteration pipeline caches
+its output per source word. ``WordCache`` is a plain ``OrderedDict`` LRU
+that counts lookups and misses for hit-rate reporting. ``save_word_caches`` and
+``load_word_caches`` write the most recently used entries to a local SQLite
+file and read them back, so a restarted worker starts warm. ``sqlite3`` is
+imported when first needed.
+"""
+import threading
+from collections import OrderedDict
+
+class WordCache:
+    """LRU mapping of source word -> transliterated word, with hit statistics."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        # Hits are lookups - misses; counting lookups per call keeps the per-word path short
+        self.lookups = 0
+        self.misses = 0
+        self.evictions = 0
+        # Held per transliteration call, not per word, so thread executors can share the cache
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def put(self, word, value):
+        self.entries[word] = value
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits ``max_size``."""
+        entries = self.entries
+        overflow = len(entries) - self.max_size
+        if overflow > 0:
+            for _ in range(overflow):
+                entries.popitem(last=False)
+            self.evictions += overflow
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def snapshot(self):
+        """``(word, output)`` pairs, least recently used first."""
+        with self.lock:
+            return list(self.entries.items())
+
+    def stats(self):
+        hits = self.lookups - self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'lookups': self.lookups,
+            'hits': hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': hits / self.lookups if self.lookups else 0.0,
+        }
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS word_cache (
+    scheme TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    word TEXT NOT NULL,
+    output TEXT NOT NULL
+)
+"""
+
+def save_word_caches(path, caches):
+    """Persist caches to the SQLite file at ``path``.
+
+    ``caches`` is an iterable of ``(scheme name, fingerprint, entries)`` where
+    ``entries`` lists ``(word, output)`` pairs, least recently used first.
+    Each scheme's previous rows are replaced in a single transaction.
+    """
+    import sqlite3
+
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            connection.execute(_SCHEMA)
+            for name, fingerprint, entries in caches:
+                connection.execute('DELETE FROM word_cache WHERE scheme = ?', (name,))
+                connection.executemany(
+                    'INSERT INTO word_cache (scheme, fingerprint, word, output) VALUES (?, ?, ?, ?)',
+                    ((name, fingerprint, word, output) for word, output in entries)
+                )
+    finally:
+        connection.close()
+
+def load_word_caches(path):
+    """Read caches saved by ``save_word_caches``.
+
+    Returns ``{(scheme name, fingerprint): [(word, output), ...]}`` with entries
+    least recently used first. Callers should ignore entries whose fingerprint
+    no longer matches their scheme, so stale output is never served.
+    """
+    import sqlite3
+
+    caches = {}
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(_SCHEMA)
+        for name, fingerprint, word, output in connection.execute(
+            'SELECT scheme, fingerprint, word, output FROM word_cache ORDER BY rowid'
+        ):
+            caches.setdefault((name, fingerprint), []).append((word, output))
+    finally:
+        connection.close()
+    return caches